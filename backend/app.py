@@ -1,12 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-from pymongo import MongoClient
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
+from pymongo import MongoClient, ReturnDocument, UpdateOne, WriteConcern
 from bson import ObjectId
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
 from werkzeug.security import generate_password_hash, check_password_hash
+import hashlib
+import json
+import logging
 import os
+import queue
 import re
 import sys
+import threading
+import time
 import uuid
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
 from dotenv import load_dotenv
 
 from backend.assignment_detail_service import get_assignment_detail
@@ -31,7 +42,13 @@ try:
     # Add backend directory to path for chat_support import
     backend_dir = os.path.dirname(os.path.abspath(__file__))
     sys.path.insert(0, backend_dir)
-    from chat_support import chat_with_ai_teacher, clear_ai_conversation, get_ai_system_status
+    from chat_support import (
+        chat_with_ai_teacher,
+        chat_with_ai_teacher_many,
+        clear_ai_conversation,
+        configure_history_collection,
+        get_ai_system_status,
+    )
     CHAT_SUPPORT_AVAILABLE = True
 except ImportError as e:
     log_warning(f"Chat support not available: {e}")
@@ -54,6 +71,9 @@ logger = setup_logger("LearningApp")
 # Import chatbot prompt utilities
 try:
     from utils.chatbot_prompt import get_system_prompt, get_user_prompt_template
+    # get_system_prompt memoizes per language at the source; the template is
+    # constant, so memoize it here too.
+    get_user_prompt_template = lru_cache(maxsize=1)(get_user_prompt_template)
     CHATBOT_PROMPT_AVAILABLE = True
 except ImportError as e:
     log_warning(f"Chatbot prompt utilities not available: {e}")
@@ -67,13 +87,282 @@ except ImportError:
     OLLAMA_AVAILABLE = False
     log_warning("Ollama is not installed. Please install it: pip install ollama")
 
-# Chatbot session storage (in-memory, stores conversation history per session)
-chatbot_sessions = {}  # Format: {session_id: [{"role": "user", "content": "message"}, {"role": "assistant", "content": "response"}, ...]}
+# One shared client so every LLM call reuses the same pooled keep-alive
+# connection instead of paying connection setup per call.
+if OLLAMA_AVAILABLE:
+    ollama_client = ollama.Client(host=os.getenv('OLLAMA_HOST', 'http://localhost:11434'))
+else:
+    ollama_client = None
+
+# Optional TTL cache for semi-static course documents
+try:
+    from cachetools import TTLCache
+    CACHETOOLS_AVAILABLE = True
+except ImportError:
+    CACHETOOLS_AVAILABLE = False
+    log_warning("cachetools is not installed; course lookups will not be cached")
+
+# Optional response compression (Brotli/gzip) for the large JSON lists
+try:
+    from flask_compress import Compress
+    FLASK_COMPRESS_AVAILABLE = True
+except ImportError:
+    FLASK_COMPRESS_AVAILABLE = False
+    log_warning("flask_compress is not installed; responses will be uncompressed")
+
+# Optional fast JSON (C-accelerated) for the LLM-heavy endpoints
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+    log_warning("orjson is not installed; falling back to stdlib json")
+
+# Chatbot session storage. Histories live in Redis when a server is
+# reachable (shared across workers, auto-expiring) and fall back to the
+# in-process dict otherwise.
+try:
+    import redis
+    redis_client = redis.Redis(
+        host=os.getenv('REDIS_HOST', 'localhost'),
+        port=int(os.getenv('REDIS_PORT', 6379)),
+        decode_responses=True,
+    )
+    redis_client.ping()
+    REDIS_AVAILABLE = True
+except Exception as e:
+    redis_client = None
+    REDIS_AVAILABLE = False
+    log_warning(f"Redis not available, chatbot sessions kept in memory: {e}")
+
+# In-memory fallback storage; bounded deques evict the oldest message in
+# O(1) instead of re-slicing the list on every append past the cap.
+# Resident messages are namedtuples, which carry a fraction of a dict's
+# per-object overhead across 50 messages x many sessions.
+# Format: {session_id: deque([ChatMsg(role, content, timestamp), ...], maxlen=50)}
+ChatMsg = namedtuple('ChatMsg', 'role content timestamp')
+chatbot_sessions = {}
+
+CHAT_SESSION_TTL = 3600  # seconds a session survives without activity
+CHAT_SESSION_MAX_MESSAGES = 50
+
+# Roles forwarded from session history into the Ollama message list
+_CHAT_ROLES = frozenset({'user', 'assistant'})
+
+
+def get_chat_history(session_id, limit=10):
+    """Return the last `limit` messages stored for a chatbot session."""
+    if REDIS_AVAILABLE:
+        try:
+            raw = redis_client.lrange(f"chat:{session_id}", -limit, -1)
+            return [json.loads(m) for m in raw]
+        except Exception as e:
+            logger.warning(f"Redis history read failed for {session_id}: {e}")
+    history = chatbot_sessions.get(session_id)
+    if not history:
+        return []
+    # Materialize dicts only for the requested window
+    return [
+        {'role': m.role, 'content': m.content, 'timestamp': m.timestamp}
+        for m in list(history)[-limit:]
+    ]
+
+
+def append_chat_messages(session_id, *msgs):
+    """Append messages to a session history, trimming to the message cap."""
+    if REDIS_AVAILABLE:
+        try:
+            key = f"chat:{session_id}"
+            pipe = redis_client.pipeline()
+            for msg in msgs:
+                pipe.rpush(key, json.dumps(msg))
+            pipe.ltrim(key, -CHAT_SESSION_MAX_MESSAGES, -1)
+            pipe.expire(key, CHAT_SESSION_TTL)
+            pipe.execute()
+            return
+        except Exception as e:
+            logger.warning(f"Redis history write failed for {session_id}: {e}")
+    history = chatbot_sessions.setdefault(
+        session_id, deque(maxlen=CHAT_SESSION_MAX_MESSAGES)
+    )
+    # maxlen evicts the oldest entries automatically
+    history.extend(
+        ChatMsg(m.get('role', ''), m.get('content', ''), m.get('timestamp', ''))
+        for m in msgs
+    )
+
+
+# Micro-batching for chatbot generations: requests arriving within a short
+# window are collected and dispatched to Ollama together, so the server can
+# batch decode steps across them (see OLLAMA_NUM_PARALLEL) instead of
+# handling each arrival in isolation.
+CHAT_BATCH_WINDOW_SECONDS = 0.02
+CHAT_BATCH_MAX_SIZE = 8
+
+_chat_batch_queue = queue.Queue()
+_chat_batch_executor = ThreadPoolExecutor(max_workers=CHAT_BATCH_MAX_SIZE)
+
+
+def _chat_batch_call(model_name, messages, options, future):
+    try:
+        future.set_result(ollama_client.chat(model=model_name, messages=messages, options=options))
+    except Exception as e:
+        future.set_exception(e)
+
+
+def _chat_batch_worker():
+    while True:
+        batch = [_chat_batch_queue.get()]  # block until the first request
+        deadline = time.monotonic() + CHAT_BATCH_WINDOW_SECONDS
+        while len(batch) < CHAT_BATCH_MAX_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_chat_batch_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Fire the whole window concurrently; each caller is unblocked via
+        # its future as soon as its own generation completes.
+        for model_name, messages, options, future in batch:
+            _chat_batch_executor.submit(_chat_batch_call, model_name, messages, options, future)
+
+
+if OLLAMA_AVAILABLE:
+    threading.Thread(target=_chat_batch_worker, daemon=True).start()
+
+
+def chat_via_batcher(model_name, messages, options, timeout=60):
+    """Run an ollama.chat call through the micro-batching queue."""
+    future = Future()
+    _chat_batch_queue.put((model_name, messages, options, future))
+    return future.result(timeout=timeout)
+
+
+def _invalidate_assignment_detail_cache(assignment_id):
+    """Drop a cached assignment-detail payload after a grading update."""
+    if REDIS_AVAILABLE:
+        try:
+            redis_client.delete(f"assign:{assignment_id}")
+        except Exception as e:
+            logger.warning(f"Assignment-detail cache invalidation failed: {e}")
 
 # Ensure Flask uses the correct templates folder (absolute path)
 TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
 app = Flask(__name__, template_folder=TEMPLATES_PATH)
 
+if FLASK_COMPRESS_AVAILABLE:
+    Compress(app)
+
+def _json_loads(raw):
+    """Parse JSON with orjson when available (2-5x faster on LLM output)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def ojsonify(payload):
+    """jsonify drop-in that serializes with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return app.response_class(orjson.dumps(payload), mimetype="application/json")
+    return jsonify(payload)
+
+
+def _stream_json_list(key, docs):
+    """
+    Stream {"success": true, "<key>": [...]} one document at a time.
+
+    Large course/assignment lists reach the client as they come off the
+    Mongo cursor instead of being fully materialized and serialized first.
+    """
+    def gen():
+        yield '{"success": true, "%s": [' % key
+        first = True
+        for doc in docs:
+            if first:
+                first = False
+            else:
+                yield ','
+            if ORJSON_AVAILABLE:
+                yield orjson.dumps(doc, default=str).decode('utf-8')
+            else:
+                yield json.dumps(doc, default=str)
+        yield ']}'
+
+    return Response(stream_with_context(gen()), mimetype='application/json')
+
+
+# Balanced-JSON extraction for LLM output that wraps JSON in extra text.
+# The third-party `regex` module supports recursion, so this matches the
+# outermost {...} precisely instead of grabbing trailing garbage.
+try:
+    import regex as _regex
+    _JSON_OBJECT_RE = _regex.compile(r'\{(?:[^{}]|(?R))*\}', _regex.DOTALL)
+except ImportError:
+    _JSON_OBJECT_RE = None
+
+
+def _extract_json_object(raw):
+    """Parse the outermost JSON object embedded in raw LLM output.
+
+    Tries the balanced-regex extraction first, then the plain brace scan.
+    Raises ValueError when no parseable object is found.
+    """
+    if _JSON_OBJECT_RE is not None:
+        match = _JSON_OBJECT_RE.search(raw)
+        if match:
+            return _json_loads(match.group(0))
+    first_brace = raw.find('{')
+    last_brace = raw.rfind('}')
+    if first_brace == -1 or last_brace <= first_brace:
+        raise ValueError("no JSON object found in LLM output")
+    return _json_loads(raw[first_brace:last_brace + 1])
+
+
+def _chat_json_text(model, messages, options):
+    """
+    Call the shared Ollama client in streaming mode and stop reading as soon as the
+    reply's outermost JSON object closes, instead of waiting for the full
+    num_predict budget. Returns the accumulated content string.
+    """
+    chunks = []
+    depth = 0
+    seen_brace = False
+    in_string = False
+    escaped = False
+    stream = ollama_client.chat(model=model, messages=messages, options=options, stream=True)
+    try:
+        for chunk in stream:
+            content = chunk.get("message", {}).get("content", "")
+            if not content:
+                continue
+            chunks.append(content)
+            # Braces inside JSON string values (e.g. set notation in a
+            # question) must not move the depth counter, so track string
+            # and escape state across chunk boundaries.
+            for ch in content:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = in_string
+                elif ch == '"':
+                    in_string = not in_string
+                elif not in_string:
+                    if ch == '{':
+                        depth += 1
+                        seen_brace = True
+                    elif ch == '}':
+                        depth -= 1
+            if seen_brace and depth <= 0:
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return "".join(chunks).strip()
+
+
 # Check required environment variables
 SECRET_KEY = os.getenv('SECRET_KEY')
 if not SECRET_KEY:
@@ -89,9 +378,37 @@ if not MONGO_URI:
 app.secret_key = SECRET_KEY
 log_success("Flask secret key configured")
 
+# Reject oversized request bodies before JSON parsing runs
+app.config['MAX_CONTENT_LENGTH'] = 1 * 1024 * 1024
+
+class _ObjectIdToStr(TypeDecoder):
+    """Decode ObjectId values straight to str at the BSON layer."""
+
+    bson_type = ObjectId
+
+    def transform_bson(self, value):
+        return str(value)
+
+
+# Codec options for read-only list handles: _id arrives as a string from
+# the C decoder, so no per-document Python conversion loop is needed.
+# Never use these handles for lookups/updates keyed by ObjectId.
+_STR_ID_OPTS = CodecOptions(type_registry=TypeRegistry([_ObjectIdToStr()]))
+
 # Connect to MongoDB
 try:
-    client = MongoClient(MONGO_URI)
+    # Pool sizing matches the gunicorn worker/thread concurrency; zstd wire
+    # compression shrinks the course/assignment list payloads (falls back to
+    # zlib where the zstandard package is missing).
+    client = MongoClient(
+        MONGO_URI,
+        maxPoolSize=50,
+        minPoolSize=5,
+        waitQueueTimeoutMS=2000,
+        serverSelectionTimeoutMS=3000,
+        retryWrites=True,
+        compressors="zstd,zlib",
+    )
     db_name = os.getenv('DB_NAME', 'learning')
     db = client[db_name]
     users_collection = db.users
@@ -99,15 +416,92 @@ try:
     assignments_collection = db.assignments
     reports_collection = db.reports
     game_scores_collection = db.game_scores
+    user_course_progress_collection = db.user_course_progress
+    llm_explanation_cache_collection = db.llm_explanation_cache
+    mcq_quiz_pool_collection = db.mcq_quiz_pool
+    # Unacknowledged handles for non-critical side-effect writes (derived
+    # course ratings, explanation cache) where losing a write is harmless.
+    courses_collection_w0 = db.get_collection("courses", write_concern=WriteConcern(w=0))
+    llm_explanation_cache_w0 = db.get_collection(
+        "llm_explanation_cache", write_concern=WriteConcern(w=0)
+    )
+    # String-_id read handles for the admin dashboard listings
+    users_collection_strid = db.get_collection("users", codec_options=_STR_ID_OPTS)
+    assignments_collection_strid = db.get_collection(
+        "assignments", codec_options=_STR_ID_OPTS
+    )
+    reports_collection_strid = db.get_collection("reports", codec_options=_STR_ID_OPTS)
+    chat_history_collection = db.chat_history
+    if CHAT_SUPPORT_AVAILABLE:
+        # Durable per-user chat history shared across workers/restarts
+        configure_history_collection(chat_history_collection)
     log_success(f"Connected to MongoDB database: {db_name}")
 except Exception as e:
     log_error(f"Failed to connect to MongoDB: {e}")
     raise
 
-def get_courses(filters=None):
+# Background pool for fire-and-forget side effects (course-rating refresh,
+# quiz-pool top-ups) so they stay off the request path.
+background_executor = ThreadPoolExecutor(max_workers=4)
+
+# Warm up the AI model from here rather than main.py: under gunicorn the
+# launcher process is replaced by execvp, so a pre-exec thread dies before
+# the pull finishes. Import time runs in every worker, and warm_up is a
+# no-op once the model is present (Ollama dedupes concurrent pulls).
+if CHAT_SUPPORT_AVAILABLE:
+    try:
+        from chat_support import ai_teacher
+        threading.Thread(target=ai_teacher.warm_up, daemon=True).start()
+        log_info("AI model warm-up started in background")
+    except Exception as e:
+        log_warning(f"Could not start AI model warm-up: {e}")
+
+
+def _update_course_rating(course_title):
+    """Recompute a course's average rating from its graded assignments."""
+    try:
+        pipeline = [
+            {"$match": {"course": course_title, "rating": {"$ne": None}}},
+            {"$group": {"_id": None, "avg_rating": {"$avg": "$rating"}}},
+        ]
+        agg = list(assignments_collection.aggregate(pipeline))
+        if agg:
+            avg_rating = float(agg[0]["avg_rating"])
+            courses_collection_w0.update_one(
+                {"title": course_title},
+                {"$set": {"rating": avg_rating}},
+            )
+    except Exception as e:
+        logger.warning(f"Failed to update course rating for {course_title}: {e}")
+
+
+# Courses change rarely but are read on every quiz/assignment generation,
+# so keep a small TTL cache of title -> course document.
+_courses_cache = TTLCache(maxsize=1024, ttl=300) if CACHETOOLS_AVAILABLE else None
+
+
+def get_course_cached(title):
+    """Fetch a course by title through the 5-minute TTL cache."""
+    if _courses_cache is not None:
+        course = _courses_cache.get(title)
+        if course is not None:
+            return course
+    course = courses_collection.find_one({"title": title})
+    if course is not None and _courses_cache is not None:
+        _courses_cache[title] = course
+    return course
+
+
+def invalidate_course_cache(title):
+    """Drop a course from the TTL cache after an admin edit/delete."""
+    if _courses_cache is not None:
+        _courses_cache.pop(title, None)
+
+
+def get_courses(filters=None, as_cursor=False):
     """Wrapper around db_services.get_courses using global collection."""
     try:
-        return db_get_courses(courses_collection, filters)
+        return db_get_courses(courses_collection, filters, as_cursor=as_cursor)
     except Exception as e:
         logger.error(f"Error getting courses: {e}")
         return []
@@ -140,10 +534,10 @@ def delete_course(course_id):
         return False
 
 
-def get_assignments(filters=None):
+def get_assignments(filters=None, as_cursor=False):
     """Wrapper around db_services.get_assignments using global collection."""
     try:
-        return db_get_assignments(assignments_collection, filters)
+        return db_get_assignments(assignments_collection, filters, as_cursor=as_cursor)
     except Exception as e:
         logger.error(f"Error getting assignments: {e}")
         return []
@@ -786,8 +1180,7 @@ def debug_session():
 def api_get_courses():
     """Get all courses"""
     try:
-        courses = get_courses()
-        return jsonify({"success": True, "courses": courses})
+        return _stream_json_list("courses", get_courses(as_cursor=True))
     except Exception as e:
         logger.error(f"Error getting courses: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -887,7 +1280,7 @@ def api_generate_course():
         ]
 
         try:
-            response = ollama.chat(
+            response = ollama_client.chat(
                 model=model_name,
                 messages=messages,
                 options={
@@ -979,8 +1372,11 @@ def api_update_course(course_id):
         }
         
         success = update_course(course_id, update_data)
-        
+
         if success:
+            # Drop stale cache entries for both the old and (possibly renamed) title
+            invalidate_course_cache(course['title'])
+            invalidate_course_cache(update_data['title'])
             return jsonify({"success": True, "message": "Course updated successfully"})
         else:
             return jsonify({"success": False, "error": "Failed to update course"}), 500
@@ -1006,8 +1402,9 @@ def api_delete_course(course_id):
             return jsonify({"success": False, "error": "Unauthorized to delete this course"}), 403
         
         success = delete_course(course_id)
-        
+
         if success:
+            invalidate_course_cache(course.get('title', ''))
             return jsonify({"success": True, "message": "Course deleted successfully"})
         else:
             return jsonify({"success": False, "error": "Failed to delete course"}), 500
@@ -1034,8 +1431,7 @@ def api_get_assignments():
         if due_date:
             filters['due_date'] = due_date
         
-        assignments = get_assignments(filters)
-        return jsonify({"success": True, "assignments": assignments})
+        return _stream_json_list("assignments", get_assignments(filters, as_cursor=True))
     except Exception as e:
         logger.error(f"Error getting assignments: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -1134,8 +1530,9 @@ def api_update_assignment(assignment_id):
         update_data['updated_at'] = datetime.utcnow()
         
         success = update_assignment(assignment_id, update_data)
-        
+
         if success:
+            _invalidate_assignment_detail_cache(assignment_id)
             return jsonify({"success": True, "message": "Assignment updated successfully"})
         else:
             return jsonify({"success": False, "error": "Failed to update assignment"}), 500
@@ -1195,7 +1592,7 @@ def api_generate_assignment():
             return jsonify({"success": False, "error": "Course title is required"}), 400
 
         # Try to load course details to give more context to the model
-        course = courses_collection.find_one({"title": course_title})
+        course = get_course_cached(course_title)
         course_description = course.get('description', '') if course else ''
         course_level = course.get('level', '') if course else ''
 
@@ -1229,7 +1626,7 @@ def api_generate_assignment():
         ]
 
         try:
-            response = ollama.chat(
+            response = ollama_client.chat(
                 model=model_name,
                 messages=messages,
                 options={
@@ -1309,9 +1706,30 @@ def api_get_assignment_detail(assignment_id):
         if not is_admin and assignment.get("student_email") != user_email:
             return jsonify({"success": False, "error": "Not authorized to view this assignment"}), 403
 
+        # Cache-aside on the built payload: completed assignments are
+        # immutable, pending ones change rarely, so serve repeat page loads
+        # from Redis. Grading updates invalidate the key.
+        cache_key = f"assign:{assignment_id}"
+        if REDIS_AVAILABLE:
+            try:
+                cached = redis_client.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Assignment-detail cache read failed: {e}")
+                cached = None
+            if cached:
+                return jsonify({"success": True, "assignment": json.loads(cached)})
+
         detail = get_assignment_detail(assignments_collection, assignment_id)
         if detail is None:
             return jsonify({"success": False, "error": "Assignment not found"}), 404
+
+        if REDIS_AVAILABLE:
+            ttl = 300 if detail.get("status") == "completed" else 60
+            try:
+                redis_client.setex(cache_key, ttl, json.dumps(detail))
+            except Exception as e:
+                logger.warning(f"Assignment-detail cache write failed: {e}")
+
         return jsonify({"success": True, "assignment": detail})
     except Exception as e:
         logger.error(f"Error getting assignment detail: {e}")
@@ -1365,7 +1783,7 @@ def api_generate_flashcards():
         ]
 
         try:
-            response = ollama.chat(
+            response = ollama_client.chat(
                 model=model_name,
                 messages=messages,
                 options={
@@ -1465,7 +1883,7 @@ def api_generate_crossword():
         ]
 
         try:
-            response = ollama.chat(
+            response = ollama_client.chat(
                 model=model_name,
                 messages=messages,
                 options={
@@ -1633,7 +2051,7 @@ def api_generate_wordsearch():
         ]
 
         try:
-            response = ollama.chat(
+            response = ollama_client.chat(
                 model=model_name,
                 messages=messages,
                 options={
@@ -1933,20 +2351,11 @@ def admin_dashboard():
     Admin dashboard showing all students, assignments, and reports.
     """
     try:
-        # Users
-        users = list(users_collection.find({}, {'password': 0}).sort('created_at', -1))
-        for u in users:
-            u['_id'] = str(u['_id'])
-
-        # Assignments
-        assignments = list(assignments_collection.find().sort('created_at', -1))
-        for a in assignments:
-            a['_id'] = str(a['_id'])
-
-        # Reports
-        reports = list(reports_collection.find().sort('created_at', -1))
-        for r in reports:
-            r['_id'] = str(r['_id'])
+        # The _strid handles decode _id directly to str, so no Python
+        # conversion loop per result set
+        users = list(users_collection_strid.find({}, {'password': 0}).sort('created_at', -1))
+        assignments = list(assignments_collection_strid.find().sort('created_at', -1))
+        reports = list(reports_collection_strid.find().sort('created_at', -1))
 
         return render_template(
             'admin.html',
@@ -2014,6 +2423,7 @@ def admin_update_assignment_marks(assignment_id):
                 {'_id': ObjectId(assignment_id)},
                 {'$set': updates},
             )
+            _invalidate_assignment_detail_cache(assignment_id)
             flash('Assignment marks updated.', 'success')
         else:
             flash('No valid marks provided to update.', 'warning')
@@ -2070,6 +2480,7 @@ def admin_review_assignment(assignment_id):
                             }
                         },
                     )
+                    _invalidate_assignment_detail_cache(assignment_id)
                     flash('Question marks updated and score recalculated.', 'success')
 
             return redirect(f'/admin/assignments/{assignment_id}/review')
@@ -2139,6 +2550,7 @@ def admin_resolve_report(report_id):
                 {'_id': assignment['_id']},
                 {'$set': manual_updates},
             )
+            _invalidate_assignment_detail_cache(assignment_id)
         else:
             # For MCQ question reports, auto grant credit for that question and recompute score/rating.
             if (
@@ -2176,6 +2588,7 @@ def admin_resolve_report(report_id):
                             }
                         },
                     )
+                    _invalidate_assignment_detail_cache(assignment_id)
 
         # Finally, mark report as resolved
         reports_collection.update_one(
@@ -2267,7 +2680,7 @@ def api_submit_assignment(assignment_id):
         ]
 
         try:
-            response = ollama.chat(
+            response = ollama_client.chat(
                 model=model_name,
                 messages=messages,
                 options={
@@ -2329,23 +2742,12 @@ def api_submit_assignment(assignment_id):
             "completed_at": datetime.utcnow(),
         }
         assignments_collection.update_one({"_id": assignment["_id"]}, {"$set": update_doc})
+        _invalidate_assignment_detail_cache(assignment_id)
 
-        # Recalculate course-level rating based on all graded assignments for this course
+        # Refresh the course-level rating off the request path; the response
+        # does not depend on it and eventual consistency is fine here.
         if course_title:
-            try:
-                pipeline = [
-                    {"$match": {"course": course_title, "rating": {"$ne": None}}},
-                    {"$group": {"_id": None, "avg_rating": {"$avg": "$rating"}}},
-                ]
-                agg = list(assignments_collection.aggregate(pipeline))
-                if agg:
-                    avg_rating = float(agg[0]["avg_rating"])
-                    courses_collection.update_one(
-                        {"title": course_title},
-                        {"$set": {"rating": avg_rating}},
-                    )
-            except Exception as e:
-                logger.warning(f"Failed to update course rating for {course_title}: {e}")
+            background_executor.submit(_update_course_rating, course_title)
 
         result = {
             "assignment_id": assignment_id,
@@ -2363,6 +2765,165 @@ def api_submit_assignment(assignment_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# Number of pre-generated quizzes to keep per (course, level). Once the pool
+# is warm, quiz starts are served from it without touching the LLM.
+MCQ_QUIZ_POOL_SIZE = 20
+
+# System prompts for the MCQ quiz flow, kept as module constants so each
+# request reuses the same string (and the Ollama server sees a byte-identical
+# prefix it can cache) instead of rebuilding it per call.
+MCQ_SYSTEM_PROMPT = (
+    "You are an expert teacher creating multiple-choice quizzes.\n"
+    "Generate EXACTLY 10 MCQ questions for the given course and level.\n"
+    "Each question must have 4 options.\n"
+    "Respond ONLY with valid JSON, no extra text.\n"
+    'JSON format:\n'
+    '{\n'
+    '  \"level\": <int>,\n'
+    '  \"questions\": [\n'
+    '    {\"question\": \"...\", \"options\": [\"opt1\", \"opt2\", \"opt3\", \"opt4\"], \"correct_index\": 0},\n'
+    '    ... 10 items total ...\n'
+    '  ]\n'
+    '}\n'
+)
+
+EXPLAIN_SYSTEM_PROMPT = (
+    "You are a math and reasoning teacher.\n"
+    "Given a multiple-choice question, the options, the student's chosen answer "
+    "and the correct answer, explain briefly WHY the student's answer is wrong and "
+    "WHY the correct answer is right.\n"
+    "Use very simple language, 1-3 short sentences, and do NOT repeat the full question."
+)
+
+BATCH_EXPLAIN_SYSTEM_PROMPT = (
+    "You are a math and reasoning teacher.\n"
+    "You will receive several multiple-choice questions, each labelled "
+    "with a numeric id in square brackets, together with the student's "
+    "chosen answer and the correct answer.\n"
+    "For EACH item, explain briefly WHY the student's answer is wrong "
+    "and WHY the correct answer is right. Use very simple language, "
+    "1-3 short sentences per item, and do NOT repeat the full question.\n"
+    "Respond ONLY with valid JSON of the form:\n"
+    '{"explanations": [{"id": 0, "text": "..."}, ...]}'
+)
+
+
+def _public_questions(questions):
+    """Build the answer-free question payload served to the frontend.
+
+    One comprehension, no intermediate objects - the dicts go straight into
+    the (orjson-backed) response serializer.
+    """
+    return [
+        {
+            "index": idx,
+            "question": q.get("question", ""),
+            "options": q.get("options", []),
+        }
+        for idx, q in enumerate(questions)
+    ]
+
+
+def _generate_mcq_questions(course_title, level):
+    """
+    Call the local LLM to generate up to 10 cleaned MCQ questions for a
+    course and level. Returns a list of question dicts, or None on failure.
+    """
+    # Try to load course details to give more context to the model
+    course = get_course_cached(course_title)
+    course_description = course.get('description', '') if course else ''
+    course_level = course.get('level', '') if course else ''
+
+    model_name = os.getenv('OLLAMA_MODEL', 'llama3.2')
+
+    user_prompt_parts = [
+        f"Course title: {course_title}",
+        f"Target quiz level: {level}",
+        "The questions should be suitable for this level.",
+    ]
+    if course_description:
+        user_prompt_parts.append(f"Course description: {course_description}")
+    if course_level:
+        user_prompt_parts.append(f"Course difficulty: {course_level}")
+
+    user_prompt = "\n".join(user_prompt_parts)
+
+    messages = [
+        {"role": "system", "content": MCQ_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+    try:
+        # Stream so generation stops as soon as the quiz JSON closes rather
+        # than running out the full 1024-token budget.
+        raw_content = _chat_json_text(
+            model_name,
+            messages,
+            options={
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "num_predict": 1024,
+            },
+        )
+    except Exception as ollama_error:
+        logger.error(f"Error calling Ollama for MCQ quiz generation: {ollama_error}")
+        return None
+
+    try:
+        quiz_data = _json_loads(raw_content)
+    except ValueError:
+        # Try to recover when the model wraps JSON with extra text
+        logger.warning(f"MCQ quiz JSON parse failed, raw: {raw_content[:200]}...")
+        try:
+            quiz_data = _extract_json_object(raw_content)
+            logger.info("Recovered MCQ quiz JSON after trimming surrounding text.")
+        except ValueError:
+            logger.error("MCQ quiz JSON recovery attempt failed.")
+            return None
+
+    questions = quiz_data.get("questions") or []
+    # Ensure we have exactly 10 questions and each has required fields
+    cleaned_questions = []
+    for q in questions:
+        text = (q.get("question") or "").strip()
+        opts = q.get("options") or []
+        if not text or len(opts) < 2:
+            continue
+        # normalise to 4 options when possible
+        opts = opts[:4]
+        correct_index = q.get("correct_index", 0)
+        try:
+            correct_index = int(correct_index)
+        except (TypeError, ValueError):
+            correct_index = 0
+        if correct_index < 0 or correct_index >= len(opts):
+            correct_index = 0
+        cleaned_questions.append({
+            "question": text,
+            "options": opts,
+            "correct_index": correct_index,
+        })
+        if len(cleaned_questions) == 10:
+            break
+
+    return cleaned_questions or None
+
+
+def _top_up_quiz_pool(course_title, level):
+    """Generate one more pooled quiz for (course, level). Runs off the request path."""
+    try:
+        questions = _generate_mcq_questions(course_title, level)
+        if questions:
+            mcq_quiz_pool_collection.insert_one({
+                "course": course_title,
+                "level": level,
+                "questions": questions,
+                "created_at": datetime.utcnow(),
+            })
+    except Exception as e:
+        logger.warning(f"Failed to top up quiz pool for {course_title} level {level}: {e}")
+
+
 @app.route('/api/assignments/quiz/start', methods=['POST'])
 def api_start_quiz_assignment():
     """
@@ -2391,127 +2952,57 @@ def api_start_quiz_assignment():
 
         user_email = session.get('email', 'anonymous@example.com')
 
-        # Determine current level for this user & course based on completed quizzes
-        completed_count = assignments_collection.count_documents({
-            "course": course_title,
-            "student_email": user_email,
-            "assignment_type": "quiz_mcq",
-            "status": "completed",
-        })
-        level = int(completed_count) + 1
-
-        # Try to load course details to give more context to the model
-        course = courses_collection.find_one({"title": course_title})
-        course_description = course.get('description', '') if course else ''
-        course_level = course.get('level', '') if course else ''
-
-        model_name = os.getenv('OLLAMA_MODEL', 'llama3.2')
-
-        system_prompt = (
-            "You are an expert teacher creating multiple-choice quizzes.\n"
-            "Generate EXACTLY 10 MCQ questions for the given course and level.\n"
-            "Each question must have 4 options.\n"
-            "Respond ONLY with valid JSON, no extra text.\n"
-            'JSON format:\n'
-            '{\n'
-            '  \"level\": <int>,\n'
-            '  \"questions\": [\n'
-            '    {\"question\": \"...\", \"options\": [\"opt1\", \"opt2\", \"opt3\", \"opt4\"], \"correct_index\": 0},\n'
-            '    ... 10 items total ...\n'
-            '  ]\n'
-            '}\n'
+        # Determine current level for this user & course based on completed quizzes.
+        # The count is maintained incrementally on quiz submit, so this is a
+        # single O(1) lookup instead of a count over the assignments collection.
+        progress = user_course_progress_collection.find_one(
+            {"user_email": user_email, "course": course_title},
+            {"quiz_completed_count": 1},
         )
-
-        user_prompt_parts = [
-            f"Course title: {course_title}",
-            f"Target quiz level: {level}",
-            "The questions should be suitable for this level.",
-        ]
-        if course_description:
-            user_prompt_parts.append(f"Course description: {course_description}")
-        if course_level:
-            user_prompt_parts.append(f"Course difficulty: {course_level}")
-
-        user_prompt = "\n".join(user_prompt_parts)
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-
-        try:
-            response = ollama.chat(
-                model=model_name,
-                messages=messages,
-                options={
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "num_predict": 1024,
-                },
+        if progress is None:
+            # Lazy backfill for users who completed quizzes before the counter
+            # existed: count once, then seed the progress document.
+            completed_count = assignments_collection.count_documents({
+                "course": course_title,
+                "student_email": user_email,
+                "assignment_type": "quiz_mcq",
+                "status": "completed",
+            })
+            user_course_progress_collection.update_one(
+                {"user_email": user_email, "course": course_title},
+                {"$setOnInsert": {"quiz_completed_count": int(completed_count)}},
+                upsert=True,
             )
-            raw_content = response["message"]["content"].strip()
-        except Exception as ollama_error:
-            logger.error(f"Error calling Ollama for MCQ quiz generation: {ollama_error}")
-            return jsonify({
-                "success": False,
-                "error": "Failed to generate MCQ quiz using the LLM",
-            }), 500
-
-        import json
+        else:
+            completed_count = progress.get("quiz_completed_count", 0)
+        level = int(completed_count) + 1
 
+        # Serve from the pre-generated pool when possible; the LLM call is by
+        # far the slowest part of this endpoint, so once the pool is warm a
+        # quiz start is just two cheap DB operations.
+        cleaned_questions = None
         try:
-            quiz_data = json.loads(raw_content)
-        except json.JSONDecodeError:
-            # Try to recover when the model wraps JSON with extra text
-            logger.warning(f"MCQ quiz JSON parse failed, raw: {raw_content[:200]}...")
-            first_brace = raw_content.find('{')
-            last_brace = raw_content.rfind('}')
-            if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-                try:
-                    trimmed = raw_content[first_brace:last_brace + 1]
-                    quiz_data = json.loads(trimmed)
-                    logger.info("Recovered MCQ quiz JSON after trimming surrounding text.")
-                except json.JSONDecodeError:
-                    logger.error("MCQ quiz JSON recovery attempt failed.")
-                    return jsonify({
-                        "success": False,
-                        "error": "LLM did not return valid JSON for the quiz. Please try again.",
-                    }), 500
-            else:
-                return jsonify({
-                    "success": False,
-                    "error": "LLM did not return valid JSON for the quiz. Please try again.",
-                }), 500
+            sampled = list(mcq_quiz_pool_collection.aggregate([
+                {"$match": {"course": course_title, "level": level}},
+                {"$sample": {"size": 1}},
+            ]))
+            if sampled:
+                cleaned_questions = sampled[0].get("questions") or None
+            pool_size = mcq_quiz_pool_collection.count_documents(
+                {"course": course_title, "level": level}
+            )
+            if pool_size < MCQ_QUIZ_POOL_SIZE:
+                background_executor.submit(_top_up_quiz_pool, course_title, level)
+        except Exception as e:
+            logger.warning(f"Quiz pool lookup failed for {course_title} level {level}: {e}")
 
-        questions = quiz_data.get("questions") or []
-        # Ensure we have exactly 10 questions and each has required fields
-        cleaned_questions = []
-        for q in questions:
-            text = (q.get("question") or "").strip()
-            opts = q.get("options") or []
-            if not text or len(opts) < 2:
-                continue
-            # normalise to 4 options when possible
-            opts = opts[:4]
-            correct_index = q.get("correct_index", 0)
-            try:
-                correct_index = int(correct_index)
-            except (TypeError, ValueError):
-                correct_index = 0
-            if correct_index < 0 or correct_index >= len(opts):
-                correct_index = 0
-            cleaned_questions.append({
-                "question": text,
-                "options": opts,
-                "correct_index": correct_index,
-            })
-            if len(cleaned_questions) == 10:
-                break
+        if cleaned_questions is None:
+            cleaned_questions = _generate_mcq_questions(course_title, level)
 
         if not cleaned_questions:
             return jsonify({
                 "success": False,
-                "error": "Failed to extract valid MCQ questions from the LLM response.",
+                "error": "Failed to generate MCQ quiz using the LLM. Please try again.",
             }), 500
 
         num_questions = len(cleaned_questions)
@@ -2540,23 +3031,14 @@ def api_start_quiz_assignment():
         assignment_id = str(result.inserted_id)
 
         # Return questions WITHOUT correct answers to the frontend
-        public_questions = [
-            {
-                "index": idx,
-                "question": q["question"],
-                "options": q["options"],
-            }
-            for idx, q in enumerate(cleaned_questions)
-        ]
-
-        return jsonify({
+        return ojsonify({
             "success": True,
             "assignment_id": assignment_id,
             "course": course_title,
             "level": level,
             "max_points": max_points,
             "num_questions": num_questions,
-            "questions": public_questions,
+            "questions": _public_questions(cleaned_questions),
         })
     except Exception as e:
         logger.error(f"Error starting MCQ quiz assignment: {e}")
@@ -2573,9 +3055,19 @@ def api_get_quiz_assignment(assignment_id):
         if 'user_id' not in session:
             return jsonify({"success": False, "error": "Authentication required"}), 401
 
-        from bson import ObjectId
-
-        assignment = assignments_collection.find_one({"_id": ObjectId(assignment_id)})
+        # Project only the fields this endpoint serves; in particular skip
+        # correct_index, results and feedback, which can be large once LLM
+        # explanations are stored.
+        assignment = assignments_collection.find_one(
+            {"_id": ObjectId(assignment_id)},
+            {
+                "assignment_type": 1,
+                "question_set.question": 1,
+                "question_set.options": 1,
+                "course": 1,
+                "difficulty_level": 1,
+            },
+        )
         if not assignment:
             return jsonify({"success": False, "error": "Assignment not found"}), 404
 
@@ -2583,16 +3075,9 @@ def api_get_quiz_assignment(assignment_id):
             return jsonify({"success": False, "error": "This assignment is not an MCQ quiz"}), 400
 
         questions = assignment.get("question_set") or []
-        public_questions = [
-            {
-                "index": idx,
-                "question": q.get("question", ""),
-                "options": q.get("options", []),
-            }
-            for idx, q in enumerate(questions)
-        ]
+        public_questions = _public_questions(questions)
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "assignment_id": assignment_id,
             "course": assignment.get("course", ""),
@@ -2605,6 +3090,23 @@ def api_get_quiz_assignment(assignment_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+def _revert_quiz_claim(snapshot):
+    """
+    Restore the status/completed_at fields stamped by the atomic submit
+    claim, using the pre-update snapshot, so a failed submit leaves the
+    assignment resubmittable instead of completed with no results.
+    """
+    try:
+        revert = {"$set": {"status": snapshot.get("status", "pending")}}
+        if snapshot.get("completed_at") is not None:
+            revert["$set"]["completed_at"] = snapshot["completed_at"]
+        else:
+            revert["$unset"] = {"completed_at": ""}
+        assignments_collection.update_one({"_id": snapshot["_id"]}, revert)
+    except Exception as e:
+        logger.error(f"Failed to revert quiz completion stamp: {e}")
+
+
 @app.route('/api/assignments/quiz/<assignment_id>/submit', methods=['POST'])
 def api_submit_quiz_assignment(assignment_id):
     """
@@ -2613,70 +3115,108 @@ def api_submit_quiz_assignment(assignment_id):
     - Computes score and rating (0-5) without calling the LLM.
     - Marks the assignment as completed and allows the next level to unlock.
     """
+    claimed = None  # pre-claim snapshot, for reverting the stamp on failure
+    results_written = False
     try:
         if 'user_id' not in session:
             return jsonify({"success": False, "error": "Authentication required"}), 401
 
-        from bson import ObjectId
-
         data = request.get_json() or {}
         answers = data.get('answers', [])
 
-        assignment = assignments_collection.find_one({"_id": ObjectId(assignment_id)})
+        # Fetch the quiz and stamp it completed in a single atomic round-trip;
+        # the returned pre-update document is used for scoring below. This
+        # also serialises concurrent submits of the same assignment.
+        assignment = assignments_collection.find_one_and_update(
+            {"_id": ObjectId(assignment_id), "assignment_type": "quiz_mcq"},
+            {"$set": {"status": "completed", "completed_at": datetime.utcnow()}},
+            projection={
+                "question_set": 1,
+                "points": 1,
+                "difficulty_level": 1,
+                "course": 1,
+                "student_email": 1,
+                "status": 1,
+                "completed_at": 1,
+            },
+            return_document=ReturnDocument.BEFORE,
+        )
         if not assignment:
+            # Distinguish missing vs wrong-type only on the error path
+            if assignments_collection.find_one({"_id": ObjectId(assignment_id)}, {"_id": 1}):
+                return jsonify({"success": False, "error": "This assignment is not an MCQ quiz"}), 400
             return jsonify({"success": False, "error": "Assignment not found"}), 404
-
-        if assignment.get("assignment_type") != "quiz_mcq":
-            return jsonify({"success": False, "error": "This assignment is not an MCQ quiz"}), 400
+        claimed = assignment
 
         questions = assignment.get("question_set") or []
         if not questions:
+            _revert_quiz_claim(assignment)
             return jsonify({"success": False, "error": "Quiz has no questions stored"}), 500
 
         num_questions = len(questions)
         max_points = int(assignment.get("points", num_questions))
 
-        # Score the quiz
+        # Score the quiz. Pre-parse the submitted answers once into a
+        # fixed-length list of ints/None, then walk the questions in a single
+        # pass - the stored question_set is validated at generation time, so
+        # itemgetter is safe and avoids repeated per-item dict lookups.
+        user_answers = []
+        for a in answers[:num_questions]:
+            try:
+                user_answers.append(int(a))
+            except (TypeError, ValueError):
+                user_answers.append(None)
+        user_answers.extend([None] * (num_questions - len(user_answers)))
+
+        get_q = itemgetter("question", "options", "correct_index")
         correct_count = 0
         detailed_results = []
-        for idx, q in enumerate(questions):
-            correct_index = int(q.get("correct_index", 0))
-            user_answer = None
-            if idx < len(answers):
-                try:
-                    user_answer = int(answers[idx])
-                except (TypeError, ValueError):
-                    user_answer = None
-            is_correct = user_answer is not None and user_answer == correct_index
+        for idx, (q_text, options, correct_index) in enumerate(map(get_q, questions)):
+            correct_index = int(correct_index)
+            user_answer = user_answers[idx]
+            is_correct = user_answer == correct_index  # None never matches an int
             if is_correct:
                 correct_count += 1
             detailed_results.append({
-                "question": q.get("question", ""),
-                "options": q.get("options", []),
+                "question": q_text,
+                "options": options,
                 "correct_index": correct_index,
                 "user_answer": user_answer,
                 "is_correct": is_correct,
             })
 
         score = float(correct_count)  # 1 mark per correct answer
-        # Map score proportion to rating 0-5
-        rating = 0.0
-        if num_questions > 0:
-            rating = (score / float(num_questions)) * 5.0
-        if rating < 0:
-            rating = 0.0
-        if rating > 5:
-            rating = 5.0
+        # Map score proportion to rating 0-5. correct_count is bounded by
+        # num_questions (checked non-zero above), so 0 <= rating <= 5 by
+        # construction and no clamping is needed.
+        rating = correct_count * 5.0 / num_questions
 
         level = int(assignment.get("difficulty_level", 1))
         feedback = f"You answered {correct_count} out of {num_questions} questions correctly."
 
         # Optional: generate per-question explanations for incorrect answers using LLM
         # This is best-effort only; if Ollama is not available, we skip detailed reasons.
-        if OLLAMA_AVAILABLE:
+        if correct_count == num_questions:
+            # Perfect score - there is nothing to explain, so don't enter the
+            # LLM path at all and let the response return immediately.
+            for r in detailed_results:
+                r["explanation"] = "Your answer is correct."
+        elif OLLAMA_AVAILABLE:
             try:
                 model_name = os.getenv('OLLAMA_MODEL', 'llama3.2')
-                for r in detailed_results:
+
+                def idx_to_label(i: int) -> str:
+                    try:
+                        return chr(ord("A") + i)
+                    except Exception:
+                        return "?"
+
+                # Build prompts for all incorrect answers first, then fire the
+                # Ollama calls concurrently - each call takes 100s of ms to
+                # seconds, so running them in a thread pool makes the
+                # explanation phase roughly as fast as the slowest single call.
+                pending = []  # list of (result index, messages)
+                for idx, r in enumerate(detailed_results):
                     # Build a short explanation only for incorrect answers
                     if not r.get("is_correct", False) and r.get("user_answer") is not None and r.get("user_answer") >= 0:
                         q_text = r.get("question", "")
@@ -2684,12 +3224,6 @@ def api_submit_quiz_assignment(assignment_id):
                         ca_idx = int(r.get("correct_index", 0))
                         ua_idx = int(r.get("user_answer", -1))
 
-                        def idx_to_label(i: int) -> str:
-                            try:
-                                return chr(ord("A") + i)
-                            except Exception:
-                                return "?"
-
                         ca_label = idx_to_label(ca_idx)
                         ua_label = idx_to_label(ua_idx)
                         ca_text = options[ca_idx] if 0 <= ca_idx < len(options) else ""
@@ -2702,14 +3236,6 @@ def api_submit_quiz_assignment(assignment_id):
                             opts_str_parts.append(f"{label}) {opt}")
                         opts_str = "\n".join(opts_str_parts)
 
-                        system_prompt = (
-                            "You are a math and reasoning teacher.\n"
-                            "Given a multiple-choice question, the options, the student's chosen answer "
-                            "and the correct answer, explain briefly WHY the student's answer is wrong and "
-                            "WHY the correct answer is right.\n"
-                            "Use very simple language, 1-3 short sentences, and do NOT repeat the full question."
-                        )
-
                         user_prompt = (
                             f"Question: {q_text}\n"
                             f"Options:\n{opts_str}\n\n"
@@ -2718,28 +3244,119 @@ def api_submit_quiz_assignment(assignment_id):
                             "Explain the mistake and the correct reasoning."
                         )
 
-                        try:
-                            response = ollama.chat(
-                                model=model_name,
-                                messages=[
-                                    {"role": "system", "content": system_prompt},
-                                    {"role": "user", "content": user_prompt},
-                                ],
-                                options={
-                                    "temperature": 0.4,
-                                    "top_p": 0.9,
-                                    "num_predict": 256,
-                                },
-                            )
-                            explanation = response["message"]["content"].strip()
-                        except Exception as explain_error:
-                            logger.warning(f"Ollama explanation error for quiz question: {explain_error}")
-                            explanation = "This answer is not correct. Review the concept and try again."
-
-                        r["explanation"] = explanation
+                        # The same (question, wrong answer, correct answer)
+                        # triple always gets a similar explanation, so check
+                        # the cache before paying for another generation.
+                        cache_key = hashlib.sha1(
+                            f"{q_text}|{ua_text}|{ca_text}".encode("utf-8")
+                        ).hexdigest()
+                        cached = llm_explanation_cache_collection.find_one(
+                            {"_id": cache_key}, {"explanation": 1}
+                        )
+                        if cached and cached.get("explanation"):
+                            r["explanation"] = cached["explanation"]
+                            continue
+
+                        pending.append((idx, cache_key, [
+                            {"role": "system", "content": EXPLAIN_SYSTEM_PROMPT},
+                            {"role": "user", "content": user_prompt},
+                        ]))
                     else:
                         # For correct answers, a simple confirmation is enough
                         r["explanation"] = "Your answer is correct."
+
+                # First try to answer all uncached questions with ONE batched
+                # LLM call returning a JSON array - one round-trip and one
+                # decode pass instead of N. Items the batch fails to cover
+                # fall through to the per-question thread-pool path below.
+                if pending:
+                    try:
+                        batch_user_prompt = "\n\n".join(
+                            f"[{bid}]\n{msgs[1]['content']}"
+                            for bid, (_idx, _key, msgs) in enumerate(pending)
+                        )
+                        raw_content = _chat_json_text(
+                            model_name,
+                            [
+                                {"role": "system", "content": BATCH_EXPLAIN_SYSTEM_PROMPT},
+                                {"role": "user", "content": batch_user_prompt},
+                            ],
+                            options={
+                                "temperature": 0.4,
+                                "top_p": 0.9,
+                                "num_predict": 256 * len(pending),
+                            },
+                        )
+                        try:
+                            parsed = _json_loads(raw_content)
+                        except ValueError:
+                            parsed = _extract_json_object(raw_content)
+
+                        by_id = {}
+                        for item in parsed.get("explanations") or []:
+                            try:
+                                text = (item.get("text") or "").strip()
+                                if text:
+                                    by_id[int(item.get("id"))] = text
+                            except (TypeError, ValueError):
+                                continue
+
+                        still_pending = []
+                        cache_ops = []
+                        for bid, (idx, cache_key, msgs) in enumerate(pending):
+                            explanation = by_id.get(bid)
+                            if explanation:
+                                detailed_results[idx]["explanation"] = explanation
+                                cache_ops.append(UpdateOne(
+                                    {"_id": cache_key},
+                                    {"$set": {
+                                        "explanation": explanation,
+                                        "created_at": datetime.utcnow(),
+                                    }},
+                                    upsert=True,
+                                ))
+                            else:
+                                still_pending.append((idx, cache_key, msgs))
+                        if cache_ops:
+                            # One unacknowledged round-trip for all cache upserts
+                            llm_explanation_cache_w0.bulk_write(cache_ops, ordered=False)
+                        pending = still_pending
+                    except Exception as batch_error:
+                        logger.warning(f"Batched explanation generation failed, falling back: {batch_error}")
+
+                if pending:
+                    explain_options = {
+                        "temperature": 0.4,
+                        "top_p": 0.9,
+                        "num_predict": 256,
+                    }
+                    with ThreadPoolExecutor(max_workers=10) as executor:
+                        futures = {
+                            executor.submit(
+                                ollama_client.chat,
+                                model=model_name,
+                                messages=msgs,
+                                options=explain_options,
+                            ): (idx, cache_key)
+                            for idx, cache_key, msgs in pending
+                        }
+                        for future in as_completed(futures):
+                            idx, cache_key = futures[future]
+                            try:
+                                response = future.result()
+                                explanation = response["message"]["content"].strip()
+                                llm_explanation_cache_w0.update_one(
+                                    {"_id": cache_key},
+                                    {"$set": {
+                                        "explanation": explanation,
+                                        "created_at": datetime.utcnow(),
+                                    }},
+                                    upsert=True,
+                                )
+                            except Exception as explain_error:
+                                logger.warning(f"Ollama explanation error for quiz question: {explain_error}")
+                                explanation = "This answer is not correct. Review the concept and try again."
+                            detailed_results[idx]["explanation"] = explanation
             except Exception as e:
                 logger.warning(f"Failed to generate detailed MCQ explanations: {e}")
                 # Fallback generic explanation text
@@ -2756,15 +3373,25 @@ def api_submit_quiz_assignment(assignment_id):
                 else:
                     r["explanation"] = "This answer is incorrect. Please check the correct option and try again."
 
+        # status/completed_at were already stamped by the atomic claim above
         update_doc = {
             "score": score,
             "rating": rating,
             "feedback": feedback,
-            "status": "completed",
-            "completed_at": datetime.utcnow(),
             "results": detailed_results,
         }
         assignments_collection.update_one({"_id": assignment["_id"]}, {"$set": update_doc})
+        results_written = True
+        _invalidate_assignment_detail_cache(assignment_id)
+
+        # Maintain the per-user completed-quiz counter used by quiz/start to pick
+        # the next level. Only count the first completion to keep resubmits idempotent.
+        if assignment.get("status") != "completed":
+            user_course_progress_collection.update_one(
+                {"user_email": assignment.get("student_email", ""), "course": assignment.get("course", "")},
+                {"$inc": {"quiz_completed_count": 1}},
+                upsert=True,
+            )
 
         # (MCQ quiz scores are not used in game leaderboard; only stored on assignments)
 
@@ -2780,9 +3407,11 @@ def api_submit_quiz_assignment(assignment_id):
             "feedback": feedback,
         }
 
-        return jsonify({"success": True, "result": result})
+        return ojsonify({"success": True, "result": result})
     except Exception as e:
         logger.error(f"Error submitting MCQ quiz assignment: {e}")
+        if claimed is not None and not results_written:
+            _revert_quiz_claim(claimed)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/test-booking-simple')
@@ -2982,6 +3611,14 @@ def api_users():
 # AI CHAT SUPPORT ROUTES
 # ============================================================================
 
+# chat.html takes no template variables, so the rendered HTML is identical
+# for every logged-in user; cache it for 5 minutes per process. base.html
+# does render flash messages, so requests with pending flashes must skip
+# the cache both ways: never serve them another user's baked-in flashes
+# and never bake theirs in for everyone else.
+_chat_page_cache = {'t': 0.0, 'html': None}
+
+
 @app.route('/chat', methods=['GET'])
 def chat_page():
     """Serve the AI chat page"""
@@ -2989,13 +3626,23 @@ def chat_page():
         if not CHAT_SUPPORT_AVAILABLE:
             flash('AI Chat support is not available. Please check the setup.', 'error')
             return redirect('/')
-        
+
         if 'user_id' not in session:
             flash('Please login to access AI chat support', 'warning')
             return redirect('/login-page')
-        
+
+        cacheable = '_flashes' not in session
+        now = time.monotonic()
+        if (cacheable and _chat_page_cache['html'] is not None
+                and now - _chat_page_cache['t'] < 300):
+            return _chat_page_cache['html']
+
         log_info("Serving AI chat page")
-        return render_template('chat.html')
+        html = render_template('chat.html')
+        if cacheable:
+            _chat_page_cache['t'] = now
+            _chat_page_cache['html'] = html
+        return html
     except Exception as e:
         log_error(f"Error serving chat page: {e}")
         return "Error loading chat page.", 500
@@ -3026,14 +3673,18 @@ def api_chat():
             }), 400
         
         user_id = session['user_id']
-        log_info(f"AI chat request from user {user_id}: {question[:50]}...")
-        
+        # log_info always prints, so guard the per-request strings behind the
+        # logger's level to keep production hot paths allocation-free.
+        if logger.isEnabledFor(logging.INFO):
+            log_info(f"AI chat request from user {user_id}: {question[:50]}...")
+
         # Get AI response
         result = chat_with_ai_teacher(user_id, question)
-        
+
         if result['success']:
-            log_info(f"AI response generated successfully for user {user_id}")
-            return jsonify(result)
+            if logger.isEnabledFor(logging.INFO):
+                log_info(f"AI response generated successfully for user {user_id}")
+            return ojsonify(result)
         else:
             log_warning(f"AI chat failed for user {user_id}: {result.get('error', 'Unknown error')}")
             return jsonify(result), 500
@@ -3045,6 +3696,50 @@ def api_chat():
             'error': 'Internal server error'
         }), 500
 
+@app.route('/api/chat/batch', methods=['POST'])
+def api_chat_batch():
+    """API endpoint to answer several questions in one concurrent batch"""
+    try:
+        if not CHAT_SUPPORT_AVAILABLE:
+            return jsonify({
+                'success': False,
+                'error': 'AI Chat support is not available'
+            }), 503
+
+        if 'user_id' not in session:
+            return jsonify({
+                'success': False,
+                'error': 'Authentication required'
+            }), 401
+
+        data = request.get_json()
+        questions = data.get('questions', [])
+
+        if not questions or not isinstance(questions, list):
+            return jsonify({
+                'success': False,
+                'error': 'A non-empty list of questions is required'
+            }), 400
+
+        user_id = session['user_id']
+        items = [(user_id, str(q).strip()) for q in questions if str(q).strip()]
+
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'A non-empty list of questions is required'
+            }), 400
+
+        results = chat_with_ai_teacher_many(items)
+        return ojsonify({'success': True, 'results': results})
+
+    except Exception as e:
+        log_error(f"Error in AI batch chat API: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
 @app.route('/api/chat/clear', methods=['POST'])
 def api_clear_chat():
     """API endpoint to clear chat history"""
@@ -3066,7 +3761,7 @@ def api_clear_chat():
         
         if success:
             log_info(f"Chat history cleared for user {user_id}")
-            return jsonify({'success': True, 'message': 'Chat history cleared'})
+            return ojsonify({'success': True, 'message': 'Chat history cleared'})
         else:
             return jsonify({
                 'success': False,
@@ -3080,6 +3775,10 @@ def api_clear_chat():
             'error': 'Internal server error'
         }), 500
 
+# Short-lived cache for the polled AI status payload
+_status_cache = {'t': 0.0, 'v': None}
+
+
 @app.route('/api/chat/status', methods=['GET'])
 def api_chat_status():
     """API endpoint to get AI system status"""
@@ -3094,8 +3793,16 @@ def api_chat_status():
                 'error': 'Chat support not available'
             })
         
+        # Clients poll this endpoint every second or two; a 2 s TTL keeps
+        # the Ollama probes in get_ai_system_status off most requests.
+        now = time.monotonic()
+        if _status_cache['v'] is not None and now - _status_cache['t'] < 2.0:
+            return ojsonify(_status_cache['v'])
+
         status = get_ai_system_status()
-        return jsonify(status)
+        _status_cache['t'] = now
+        _status_cache['v'] = status
+        return ojsonify(status)
     except Exception as e:
         log_error(f"Error getting AI system status: {e}")
         return jsonify({
@@ -3107,6 +3814,11 @@ def api_chat_status():
 # CHATBOT API ROUTES
 # ============================================================================
 
+# Compiled once at import; detect_language runs on every chatbot request.
+_DEVANAGARI_RE = re.compile(r'[\u0900-\u097F]')
+_ENGLISH_RE = re.compile(r'[a-zA-Z]')
+
+
 def detect_language(text):
     """
     Detects the language of the user's message.
@@ -3114,15 +3826,13 @@ def detect_language(text):
     """
     if not text:
         return 'en'  # Default to English
-    
+
     # Check for Devanagari script (Hindi characters)
-    devanagari_pattern = re.compile(r'[\u0900-\u097F]')
-    has_hindi = bool(devanagari_pattern.search(text))
-    
+    has_hindi = bool(_DEVANAGARI_RE.search(text))
+
     # Check for English characters (letters)
-    english_pattern = re.compile(r'[a-zA-Z]')
-    has_english = bool(english_pattern.search(text))
-    
+    has_english = bool(_ENGLISH_RE.search(text))
+
     # Determine language
     if has_hindi and has_english:
         return 'hinglish'
@@ -3138,37 +3848,23 @@ def api_chatbot():
         data = request.get_json()
         user_message = data.get('message', '').strip()
         session_id = data.get('session_id', None)
-        history = data.get('history', [])
-        
+
         if not user_message:
             return jsonify({"success": False, "error": "Message is required"}), 400
-        
+
+        # Bound prompt size before it balloons into network transfer and
+        # inference time on the Ollama side.
+        if len(user_message) > int(os.getenv('CHAT_MAX_MSG_CHARS', 4000)):
+            return jsonify({"success": False, "error": "Message too long"}), 413
+
         # Create new session if session_id is not provided
         if not session_id:
             session_id = f"chat_{uuid.uuid4().hex[:16]}"
-            logger.info(f"Created new chat session: {session_id}")
-        
-        # Initialize session if it doesn't exist
-        if session_id not in chatbot_sessions:
-            chatbot_sessions[session_id] = []
-            logger.info(f"Initialized new session storage for: {session_id}")
-        
-        # Get conversation history from session storage
-        session_history = chatbot_sessions[session_id]
-        
-        # Use provided history if available, otherwise use session history
-        if not history and session_history:
-            # Convert session history to the format expected by LLM
-            history = []
-            for msg in session_history[-10:]:  # Last 10 messages
-                if msg.get('role') == 'user':
-                    history.append({'user': msg.get('content', ''), 'assistant': ''})
-                elif msg.get('role') == 'assistant':
-                    if history and history[-1].get('user'):
-                        history[-1]['assistant'] = msg.get('content', '')
-                    else:
-                        history.append({'user': '', 'assistant': msg.get('content', '')})
-        
+            logger.info("Created new chat session: %s", session_id)
+
+        # Get recent conversation history from session storage (Redis-backed)
+        session_history = get_chat_history(session_id, 10)
+
         # Check if Ollama is available
         if not OLLAMA_AVAILABLE:
             return jsonify({
@@ -3179,7 +3875,8 @@ def api_chatbot():
         
         # Detect language BEFORE processing with LLM
         detected_lang = detect_language(user_message)
-        logger.info(f"Detected language for message '{user_message[:50]}...': {detected_lang}")
+        # Lazy %-formatting: the string is only built if INFO is enabled
+        logger.info("Detected language for message '%.50s...': %s", user_message, detected_lang)
         
         # Get system prompt with language-specific instructions
         if CHATBOT_PROMPT_AVAILABLE:
@@ -3190,61 +3887,142 @@ def api_chatbot():
             system_prompt = "You are a Learning Assistant for a student learning platform. Help students with courses, assignments, and learning questions."
             user_prompt_template = "{user_message}"
         
-        # Build conversation messages for Ollama (using session history)
-        messages = [{'role': 'system', 'content': system_prompt}]
-        
-        # Add conversation history from session storage
-        if session_history:
-            # Convert session history to Ollama message format
-            for msg in session_history[-10:]:  # Last 10 messages for context
-                if msg.get('role') in ['user', 'assistant']:
-                    messages.append({
-                        'role': msg['role'],
-                        'content': msg.get('content', '')
-                    })
-        
-        # Add current user message with chain-of-thought instruction
-        messages.append({
-            'role': 'user',
-            'content': user_prompt_template.format(user_message=user_message)
-        })
+        # Build conversation messages for Ollama in one pass: system prompt
+        # followed by the recent history window in Ollama message format.
+        recent = session_history[-10:]  # Last 10 messages for context
+        messages = [{'role': 'system', 'content': system_prompt}] + [
+            {'role': m['role'], 'content': m.get('content', '')}
+            for m in recent
+            if m.get('role') in _CHAT_ROLES
+        ]
+
+
+        # Add current user message with chain-of-thought instruction. The
+        # fallback template is just "{user_message}", where .format would be
+        # a pure copy - skip it in that case.
+        if user_prompt_template == "{user_message}":
+            content = user_message
+        else:
+            content = user_prompt_template.format(user_message=user_message)
+        messages.append({'role': 'user', 'content': content})
         
         # Get model name from environment or use default
         model_name = os.getenv('OLLAMA_MODEL', 'llama3.2')
-        
+
+        chat_options = {
+            'temperature': 0.7,
+            'top_p': 0.9,
+            'num_predict': 2000,
+            'repeat_penalty': 1.2
+        }
+
+        # Opt-in token streaming: clients that send {"stream": true} get an
+        # SSE stream with one event per token and a final done event. The
+        # default stays a single JSON body, which the bundled frontend expects.
+        if data.get('stream'):
+            def generate():
+                bot_parts = []
+                try:
+                    for chunk in ollama_client.chat(
+                        model=model_name,
+                        messages=messages,
+                        stream=True,
+                        options=chat_options,
+                    ):
+                        token = chunk.get('message', {}).get('content', '')
+                        if token:
+                            bot_parts.append(token)
+                            yield f"data: {json.dumps({'token': token})}\n\n"
+                except Exception as stream_error:
+                    logger.error(f"Ollama streaming error: {stream_error}")
+                    yield f"data: {json.dumps({'error': str(stream_error)})}\n\n"
+                    return
+                bot_response = ''.join(bot_parts).strip()
+                now_iso = datetime.utcnow().isoformat()
+                append_chat_messages(
+                    session_id,
+                    {
+                        'role': 'user',
+                        'content': user_message,
+                        'timestamp': now_iso
+                    },
+                    {
+                        'role': 'assistant',
+                        'content': bot_response,
+                        'timestamp': now_iso
+                    },
+                )
+                yield f"data: {json.dumps({'done': True, 'session_id': session_id})}\n\n"
+
+            return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+        # Answer cache for context-free questions: the same normalized
+        # question (per detected language) is served straight from Redis
+        # without another generation. Turns with existing history are
+        # contextual and never cached.
+        answer_cache_key = None
+        if REDIS_AVAILABLE and not session_history:
+            normalized = ' '.join(user_message.lower().split())
+            answer_cache_key = 'chatbot:ans:' + hashlib.sha1(
+                f"{detected_lang}|{normalized}".encode('utf-8')
+            ).hexdigest()
+            try:
+                cached_response = redis_client.get(answer_cache_key)
+            except Exception as e:
+                logger.warning(f"Chatbot answer-cache read failed: {e}")
+                cached_response = None
+            if cached_response:
+                now_iso = datetime.utcnow().isoformat()
+                append_chat_messages(
+                    session_id,
+                    {
+                        'role': 'user',
+                        'content': user_message,
+                        'timestamp': now_iso
+                    },
+                    {
+                        'role': 'assistant',
+                        'content': cached_response,
+                        'timestamp': now_iso
+                    },
+                )
+                return ojsonify({
+                    "success": True,
+                    "response": cached_response,
+                    "session_id": session_id
+                })
+
         try:
             # Call Ollama with chain-of-thought reasoning and full conversation history
-            response = ollama.chat(
-                model=model_name,
-                messages=messages,
-                options={
-                    'temperature': 0.7,
-                    'top_p': 0.9,
-                    'num_predict': 2000,
-                    'repeat_penalty': 1.2
-                }
-            )
+            response = chat_via_batcher(model_name, messages, chat_options)
             
             bot_response = response['message']['content'].strip()
-            
-            # Store conversation in session history
-            chatbot_sessions[session_id].append({
-                'role': 'user',
-                'content': user_message,
-                'timestamp': datetime.utcnow().isoformat()
-            })
-            chatbot_sessions[session_id].append({
-                'role': 'assistant',
-                'content': bot_response,
-                'timestamp': datetime.utcnow().isoformat()
-            })
-            
-            # Limit session history to last 50 messages to prevent memory issues
-            if len(chatbot_sessions[session_id]) > 50:
-                chatbot_sessions[session_id] = chatbot_sessions[session_id][-50:]
-            
-            logger.info(f"Chatbot response generated successfully for session: {session_id}")
-            return jsonify({
+
+            if answer_cache_key and bot_response:
+                try:
+                    redis_client.setex(answer_cache_key, 3600, bot_response)
+                except Exception as e:
+                    logger.warning(f"Chatbot answer-cache write failed: {e}")
+
+            # Store conversation in session history (trimmed + TTL'd in storage)
+            now_iso = datetime.utcnow().isoformat()
+            append_chat_messages(
+                session_id,
+                {
+                    'role': 'user',
+                    'content': user_message,
+                    'timestamp': now_iso
+                },
+                {
+                    'role': 'assistant',
+                    'content': bot_response,
+                    'timestamp': now_iso
+                },
+            )
+
+
+            logger.info("Chatbot response generated successfully for session: %s", session_id)
+            return ojsonify({
                 "success": True,
                 "response": bot_response,
                 "session_id": session_id
@@ -3276,11 +4054,15 @@ def api_chatbot():
             "response": "I'm sorry, I encountered an error. Please try again."
         }), 500
 
-if __name__ == '__main__':
-    # Show startup banner
-    log_startup()
-    
-    # Create indexes for better performance
+def run_migrations():
+    """
+    One-shot index creation and data backfills.
+
+    Normally invoked from scripts/migrate.py during deployment; set
+    RUN_MIGRATIONS=1 to run at app start instead. Keeping this out of the
+    normal boot path avoids a handful of Mongo round-trips (and a
+    collection scan for the username backfill) on every restart.
+    """
     try:
         # Drop old username index if it exists
         try:
@@ -3288,27 +4070,75 @@ if __name__ == '__main__':
             log_info("Dropped old username index")
         except Exception as e:
             log_info(f"Username index drop result: {e}")
-        
-        # Clean up existing users with null usernames
+
+        # Clean up existing users with null usernames. The aggregation
+        # pipeline form is required for "$email" to be evaluated as a field
+        # reference rather than stored as a literal string.
         try:
             result = users_collection.update_many(
                 {"username": None},
-                {"$set": {"username": "$email"}}
+                [{"$set": {"username": "$email"}}]
             )
             if result.modified_count > 0:
                 log_info(f"Updated {result.modified_count} users with null usernames")
         except Exception as e:
             log_warning(f"Error updating null usernames: {e}")
-        
+
         # Create new indexes
         users_collection.create_index("email", unique=True)
         users_collection.create_index("phone", unique=True)
         # Create username index with sparse option to allow null values
         users_collection.create_index("username", unique=True, sparse=True)
+        # One progress document per (user, course) for the quiz level counter
+        user_course_progress_collection.create_index(
+            [("user_email", 1), ("course", 1)], unique=True
+        )
+        # Compound index matching the quiz count/lookup filter shape
+        assignments_collection.create_index(
+            [("student_email", 1), ("course", 1), ("assignment_type", 1), ("status", 1)],
+            background=True,
+        )
+        # Speeds up the course-average rating aggregation
+        assignments_collection.create_index(
+            [("course", 1), ("rating", 1)], background=True
+        )
+        # Match the list-endpoint query shapes so filter + sort run as an
+        # index range scan instead of COLLSCAN + in-memory sort
+        courses_collection.create_index(
+            [("category", 1), ("level", 1), ("created_at", -1)], background=True
+        )
+        assignments_collection.create_index(
+            [("course", 1), ("status", 1), ("due_date", 1)], background=True
+        )
+        assignments_collection.create_index(
+            [("student_email", 1), ("due_date", 1)], background=True
+        )
+        # Cached LLM explanations expire after a week
+        llm_explanation_cache_collection.create_index(
+            "created_at", expireAfterSeconds=7 * 24 * 3600
+        )
+        # Pool of pre-generated quizzes, sampled per (course, level)
+        mcq_quiz_pool_collection.create_index(
+            [("course", 1), ("level", 1)], background=True
+        )
+        # Chat histories idle for 30 days are reaped by the TTL monitor
+        chat_history_collection.create_index(
+            "updated_at", expireAfterSeconds=30 * 24 * 3600
+        )
         log_success("Database indexes created successfully")
     except Exception as e:
         log_warning(f"Index creation warning: {e}")
-    
+
+
+if __name__ == '__main__':
+    # Show startup banner
+    log_startup()
+
+    # Index/backfill migrations are one-shot; run scripts/migrate.py during
+    # deployment, or set RUN_MIGRATIONS=1 to run them at boot.
+    if os.getenv('RUN_MIGRATIONS') == '1':
+        run_migrations()
+
 
     # Get configuration from environment variables
     debug_mode = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
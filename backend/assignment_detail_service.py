@@ -12,34 +12,32 @@ from bson import ObjectId
 
 def _build_quiz_mcq_detail(assignment: Dict[str, Any]) -> Dict[str, Any]:
     """Build detail payload for MCQ quiz assignments."""
-    questions: List[Dict[str, Any]] = []
-
     # Prefer detailed results if quiz has been completed
     results = assignment.get("results")
     if results:
-        for r in results:
-            questions.append(
-                {
-                    "question": r.get("question", ""),
-                    "options": r.get("options", []),
-                    "correct_index": r.get("correct_index", 0),
-                    "user_answer": r.get("user_answer", None),
-                    "is_correct": bool(r.get("is_correct", False)),
-                    "explanation": r.get("explanation", ""),
-                }
-            )
+        questions: List[Dict[str, Any]] = [
+            {
+                "question": r.get("question", ""),
+                "options": r.get("options", []),
+                "correct_index": r.get("correct_index", 0),
+                "user_answer": r.get("user_answer", None),
+                "is_correct": bool(r.get("is_correct", False)),
+                "explanation": r.get("explanation", ""),
+            }
+            for r in results
+        ]
     else:
         # Pending quiz: show questions without marking correctness
-        for q in assignment.get("question_set", []):
-            questions.append(
-                {
-                    "question": q.get("question", ""),
-                    "options": q.get("options", []),
-                    "correct_index": q.get("correct_index", 0),
-                    "user_answer": None,
-                    "is_correct": None,
-                }
-            )
+        questions = [
+            {
+                "question": q.get("question", ""),
+                "options": q.get("options", []),
+                "correct_index": q.get("correct_index", 0),
+                "user_answer": None,
+                "is_correct": None,
+            }
+            for q in assignment.get("question_set", [])
+        ]
 
     base: Dict[str, Any] = {
         "type": "quiz_mcq",
@@ -71,7 +69,27 @@ def get_assignment_detail(
     Returns:
         A dictionary with all assignment detail fields, or None if not found.
     """
-    assignment = assignments_collection.find_one({"_id": ObjectId(assignment_id)})
+    # Project only the fields the detail payload uses; skips any extra
+    # metadata and keeps BSON decode work proportional to what is served.
+    assignment = assignments_collection.find_one(
+        {"_id": ObjectId(assignment_id)},
+        {
+            "title": 1,
+            "course": 1,
+            "status": 1,
+            "points": 1,
+            "score": 1,
+            "rating": 1,
+            "difficulty_level": 1,
+            "feedback": 1,
+            "assignment_type": 1,
+            "results": 1,
+            "question_set": 1,
+            "question": 1,
+            "description": 1,
+            "student_answer": 1,
+        },
+    )
     if not assignment:
         return None
 
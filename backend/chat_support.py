@@ -3,92 +3,44 @@
 AI-powered tuition teacher using Ollama to help students with their questions
 """
 
+import asyncio
+import atexit
+import hashlib
 import requests
 import json
 import logging
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import cached_property
+from requests.adapters import HTTPAdapter, Retry
+from typing import Dict, List, Optional, Tuple
 import os
+import time
 
 # Load environment variables from YAML file
 from utils import load_env_from_yaml
 load_env_from_yaml()
 
-# LangChain imports
+# Optional numpy for C-level similarity search over turn embeddings
 try:
-    from langchain_community.llms import Ollama
-    from langchain.schema import HumanMessage, AIMessage, SystemMessage
-    from langchain.memory import ConversationBufferMemory
-    from langchain.chains import ConversationChain
-    from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-    from langsmith import Client
-    LANGCHAIN_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
 except ImportError:
-    LANGCHAIN_AVAILABLE = False
+    NUMPY_AVAILABLE = False
+
+# Ollama SDK (async client) for batched question handling
+try:
+    from ollama import AsyncClient
+    OLLAMA_SDK_AVAILABLE = True
+except ImportError:
+    OLLAMA_SDK_AVAILABLE = False
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
-class AITuitionTeacher:
-    """
-    AI-powered tuition teacher using Ollama to provide educational support
-    """
-    
-    def __init__(self, ollama_base_url: str = None):
-        """
-        Initialize the AI Tuition Teacher
-        
-        Args:
-            ollama_base_url: Base URL for Ollama API (default: from environment)
-        """
-        self.ollama_base_url = ollama_base_url or os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
-        self.model_name = os.getenv('OLLAMA_MODEL', 'llama3.2')
-        self.conversation_history = {}  # Store conversation history per user
-        
-        # Initialize LangSmith if available
-        self.langsmith_client = None
-        if LANGCHAIN_AVAILABLE:
-            try:
-                # Set up LangSmith using environment variables
-                langchain_api_key = os.getenv('LANGCHAIN_API_KEY')
-                langchain_project = os.getenv('LANGCHAIN_PROJECT', 'learning-app-ai')
-                langchain_endpoint = os.getenv('LANGCHAIN_ENDPOINT', 'https://api.smith.langchain.com')
-                langchain_tracing = os.getenv('LANGCHAIN_TRACING_V2', 'true')
-                
-                if langchain_api_key and langchain_api_key != "YOUR_LANGCHAIN_API_KEY_HERE":
-                    os.environ["LANGCHAIN_TRACING_V2"] = langchain_tracing
-                    os.environ["LANGCHAIN_API_KEY"] = langchain_api_key
-                    os.environ["LANGCHAIN_PROJECT"] = langchain_project
-                    os.environ["LANGCHAIN_ENDPOINT"] = langchain_endpoint
-                    
-                    self.langsmith_client = Client()
-                    logger.info("LangSmith client initialized successfully")
-                else:
-                    logger.warning("LANGCHAIN_API_KEY not found or is placeholder. Please set a valid API key in your environment variables.")
-            except Exception as e:
-                logger.warning(f"Failed to initialize LangSmith: {e}")
-                self.langsmith_client = None
-        
-        # Initialize LangChain Ollama if available
-        self.llm = None
-        if LANGCHAIN_AVAILABLE:
-            try:
-                self.llm = Ollama(
-                    base_url=self.ollama_base_url,
-                    model=self.model_name,
-                    temperature=0.7
-                )
-                logger.info(f"LangChain Ollama initialized with model: {self.model_name}")
-            except Exception as e:
-                logger.warning(f"Failed to initialize LangChain Ollama: {e}")
-                self.llm = None
-        self.system_prompt = self._get_system_prompt()
-        
-    def _get_system_prompt(self) -> str:
-        """
-        Get the system prompt that defines the AI teacher's role and behavior
-        """
-        return """You are an experienced and friendly AI tuition teacher for the Learning App. Your role is to help students with their academic questions and provide educational support.
+# The teacher persona is immutable, so build (and hash) it exactly once at
+# import; every instance shares the same interned string.
+_SYSTEM_PROMPT = """You are an experienced and friendly AI tuition teacher for the Learning App. Your role is to help students with their academic questions and provide educational support.
 
 PERSONALITY & APPROACH:
 - Be encouraging, patient, and supportive
@@ -124,95 +76,347 @@ RESPONSE FORMAT:
 
 Remember: Your goal is to make learning enjoyable and accessible for every student!"""
 
-    def _check_ollama_connection(self) -> bool:
+_SYSTEM_PROMPT_HASH = hashlib.blake2b(
+    _SYSTEM_PROMPT.encode('utf-8'), digest_size=16
+).hexdigest()
+
+
+# How many past turns to inject when relevance retrieval is active
+_TOP_K_CONTEXT = 5
+
+
+def _iso_now() -> str:
+    """
+    UTC ISO-8601 timestamp for chat messages
+
+    Cheaper than datetime.now().isoformat() on the per-message hot path:
+    no local-timezone lookup, and the timestamps sort naturally as UTC.
+    """
+    return datetime.utcfromtimestamp(time.time()).isoformat() + "Z"
+
+class AITuitionTeacher:
+    """
+    AI-powered tuition teacher using Ollama to provide educational support
+    """
+    
+    def __init__(self, ollama_base_url: str = None, history_collection=None):
         """
-        Check if Ollama is running and accessible
+        Initialize the AI Tuition Teacher
+
+        Args:
+            ollama_base_url: Base URL for Ollama API (default: from environment)
+            history_collection: Optional MongoDB collection for durable
+                conversation history (one document per user)
+        """
+        self.ollama_base_url = ollama_base_url or os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+        self.model_name = os.getenv('OLLAMA_MODEL', 'llama3.2')
+        self.embed_model = os.getenv('OLLAMA_EMBED_MODEL', 'mxbai-embed-large')
+        self.conversation_history = {}  # In-process cache of recent histories
+        self.embeddings = {}  # Per-user turn embeddings, parallel to history
+        # When set, histories are lazily loaded from and written through to
+        # MongoDB so they survive restarts and are shared across workers
+        self.history_collection = history_collection
+        # Persistent HTTP session so every Ollama call reuses one kept-alive
+        # connection instead of paying a fresh TCP handshake per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Connection": "keep-alive",
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": "learning-app/1.0",
+        })
+        atexit.register(self.session.close)
+        # Bounded LRU of full responses keyed by (model, system prompt,
+        # recent context, question) — repeat questions skip inference
+        self._response_cache = OrderedDict()
+        self._response_cache_max = 1024
+        # Expiry deadlines (time.monotonic) for the cached connection and
+        # model availability checks, so a warm server is not re-probed with
+        # two /api/tags round trips on every single chat turn
+        self._check_ttl = 60.0
+        self._ollama_ok_until = 0.0
+        self._model_ok_until = 0.0
+        # Memoized /api/tags result shared by the connection, model and
+        # status checks — one probe instead of three per caller
+        self._tags_value = (False, [])
+        self._tags_expires = 0.0
         
+        self.system_prompt = _SYSTEM_PROMPT
+        self._system_hash = _SYSTEM_PROMPT_HASH
+
+    @cached_property
+    def langsmith_client(self):
+        """
+        LangSmith client, imported and configured on first use
+
+        The langsmith/langchain dependency graph costs seconds of import
+        time and tens of MB per worker, so it only loads when a caller
+        actually touches this property and ENABLE_LANGCHAIN=1 is set.
+        """
+        if os.getenv('ENABLE_LANGCHAIN', '0') != '1':
+            return None
+        try:
+            from langsmith import Client
+
+            langchain_api_key = os.getenv('LANGCHAIN_API_KEY')
+            langchain_project = os.getenv('LANGCHAIN_PROJECT', 'learning-app-ai')
+            langchain_endpoint = os.getenv('LANGCHAIN_ENDPOINT', 'https://api.smith.langchain.com')
+            langchain_tracing = os.getenv('LANGCHAIN_TRACING_V2', 'true')
+
+            if langchain_api_key and langchain_api_key != "YOUR_LANGCHAIN_API_KEY_HERE":
+                os.environ["LANGCHAIN_TRACING_V2"] = langchain_tracing
+                os.environ["LANGCHAIN_API_KEY"] = langchain_api_key
+                os.environ["LANGCHAIN_PROJECT"] = langchain_project
+                os.environ["LANGCHAIN_ENDPOINT"] = langchain_endpoint
+
+                client = Client()
+                logger.info("LangSmith client initialized successfully")
+                return client
+            logger.warning("LANGCHAIN_API_KEY not found or is placeholder. Please set a valid API key in your environment variables.")
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to initialize LangSmith: {e}")
+            return None
+
+    @cached_property
+    def llm(self):
+        """LangChain Ollama wrapper, imported on first use (see langsmith_client)"""
+        if os.getenv('ENABLE_LANGCHAIN', '0') != '1':
+            return None
+        try:
+            from langchain_community.llms import Ollama
+
+            llm = Ollama(
+                base_url=self.ollama_base_url,
+                model=self.model_name,
+                temperature=0.7
+            )
+            logger.info(f"LangChain Ollama initialized with model: {self.model_name}")
+            return llm
+        except Exception as e:
+            logger.warning(f"Failed to initialize LangChain Ollama: {e}")
+            return None
+
+    def _fetch_tags(self) -> Tuple[bool, List[str]]:
+        """
+        Probe /api/tags once and memoize the result for 30 seconds
+
+        The connection check, model check and status endpoint all need the
+        same answer; sharing one cached probe cuts the Ollama-side load to
+        a third and keeps repeat calls off the network entirely.
+
         Returns:
-            bool: True if Ollama is accessible, False otherwise
+            Tuple of (reachable, available model names)
         """
+        now = time.monotonic()
+        if now < self._tags_expires:
+            return self._tags_value
         try:
-            response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=5)
-            return response.status_code == 200
+            response = self.session.get(f"{self.ollama_base_url}/api/tags", timeout=10)
+            if response.status_code == 200:
+                models = [m['name'] for m in response.json().get('models', [])]
+                self._tags_value = (True, models)
+            else:
+                self._tags_value = (False, [])
         except Exception as e:
             logger.error(f"Ollama connection failed: {e}")
-            return False
+            self._tags_value = (False, [])
+        self._tags_expires = now + 30.0
+        return self._tags_value
+
+    def _check_ollama_connection(self) -> bool:
+        """
+        Check if Ollama is running and accessible
+
+        Returns:
+            bool: True if Ollama is accessible, False otherwise
+        """
+        return self._fetch_tags()[0]
 
     def _get_available_models(self) -> List[str]:
         """
         Get list of available Ollama models
-        
+
         Returns:
             List[str]: List of available model names
         """
-        try:
-            response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=10)
-            if response.status_code == 200:
-                models = response.json().get('models', [])
-                return [model['name'] for model in models]
-            return []
-        except Exception as e:
-            logger.error(f"Failed to get available models: {e}")
-            return []
+        return self._fetch_tags()[1]
 
     def _ensure_model_available(self) -> bool:
         """
-        Ensure the required model is available, pull if necessary
-        
+        Check whether the required model is present
+
+        Never pulls: a pull can block for minutes and must not run on the
+        request path — that happens once in warm_up() at startup.
+
         Returns:
             bool: True if model is available, False otherwise
         """
         try:
-            # Check if model exists
-            models = self._get_available_models()
-            if self.model_name in models:
-                return True
-            
-            # Try to pull the model
-            logger.info(f"Model {self.model_name} not found. Attempting to pull...")
-            pull_response = requests.post(
+            return self.model_name in self._get_available_models()
+        except Exception as e:
+            logger.error(f"Error ensuring model availability: {e}")
+            return False
+
+    def warm_up(self):
+        """
+        Pull the configured model if it is missing
+
+        Intended to run in a daemon thread at server start so the
+        potentially minutes-long pull never blocks a student's request.
+        """
+        try:
+            if not self._check_ollama_connection():
+                logger.warning("Warm-up skipped: Ollama is not reachable")
+                return
+            if self.model_name in self._get_available_models():
+                logger.info(f"Model {self.model_name} already available")
+                return
+
+            logger.info(f"Model {self.model_name} not found. Pulling in background...")
+            pull_response = self.session.post(
                 f"{self.ollama_base_url}/api/pull",
                 json={"name": self.model_name},
                 timeout=300  # 5 minutes timeout for model pull
             )
-            
+
             if pull_response.status_code == 200:
                 logger.info(f"Successfully pulled model {self.model_name}")
-                return True
             else:
                 logger.error(f"Failed to pull model {self.model_name}: {pull_response.text}")
-                return False
-                
         except Exception as e:
-            logger.error(f"Error ensuring model availability: {e}")
-            return False
+            logger.error(f"Error warming up model: {e}")
 
-    def _get_conversation_context(self, user_id: str, max_messages: int = 10) -> str:
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
-        Get conversation context for the user
-        
+        Embed several texts in a single /api/embed round trip
+
+        The batch endpoint accepts an array input, so N texts cost one HTTP
+        call instead of N — the connection overhead is amortized across the
+        whole batch.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of embedding vectors, one per input text (empty on failure)
+        """
+        if not texts:
+            return []
+        try:
+            response = self.session.post(
+                f"{self.ollama_base_url}/api/embed",
+                json={"model": self.embed_model, "input": texts},
+                timeout=60
+            )
+            if response.status_code == 200:
+                return response.json().get('embeddings', [])
+            logger.error(f"Ollama embed error: {response.status_code} - {response.text}")
+            return []
+        except Exception as e:
+            logger.error(f"Error embedding batch: {e}")
+            return []
+
+    def _get_history(self, user_id: str) -> deque:
+        """
+        Get the user's history deque, lazily loading from MongoDB
+
         Args:
             user_id: User ID
+
+        Returns:
+            deque: The user's bounded conversation history
+        """
+        history = self.conversation_history.get(user_id)
+        if history is None:
+            history = deque(maxlen=20)
+            if self.history_collection is not None:
+                try:
+                    doc = self.history_collection.find_one(
+                        {"_id": user_id}, {"messages": 1}
+                    )
+                    if doc:
+                        history.extend(doc.get('messages', []))
+                except Exception as e:
+                    logger.warning(f"Failed to load chat history for {user_id}: {e}")
+            self.conversation_history[user_id] = history
+            # Parallel embedding slots for any preloaded turns (not embedded
+            # retroactively — relevance retrieval waits for fresh turns)
+            self.embeddings[user_id] = deque([None] * len(history), maxlen=20)
+        return history
+
+    def _build_messages(self, user_question: str, user_id: str, max_messages: int = 20) -> List[Dict[str, str]]:
+        """
+        Build the /api/chat messages list for a question
+
+        The static system prompt always comes first and byte-identical, so
+        Ollama can reuse its cached prompt prefix across turns instead of
+        re-evaluating the system tokens every time.
+
+        Args:
+            user_question: Student's question
+            user_id: User ID for conversation context
             max_messages: Maximum number of previous messages to include
-            
+
         Returns:
-            str: Formatted conversation context
+            List of {'role', 'content'} message dicts
         """
-        if user_id not in self.conversation_history:
-            return ""
-        
-        history = self.conversation_history[user_id][-max_messages:]
-        context = ""
-        
-        for msg in history:
-            role = msg.get('role', 'user')
-            content = msg.get('content', '')
-            if role == 'user':
-                context += f"Student: {content}\n"
-            else:
-                context += f"Teacher: {content}\n"
-        
-        return context
+        return (
+            [{'role': 'system', 'content': self.system_prompt}]
+            + [
+                {'role': msg.get('role', 'user'), 'content': msg.get('content', '')}
+                for msg in self._relevant_history(user_id, user_question, max_messages)
+            ]
+            + [{'role': 'user', 'content': user_question}]
+        )
+
+    def _relevant_history(self, user_id: str, user_question: str, max_messages: int = 20) -> List[Dict[str, str]]:
+        """
+        Select the past turns to inject into the prompt
+
+        When numpy is available and every recent turn has an embedding, only
+        the _TOP_K_CONTEXT turns most similar to the current question are
+        returned (in chronological order) — prompt length drops from the
+        full 20-turn window to K turns, which is a superlinear token-cost
+        saving given quadratic attention. Anything missing (numpy, the
+        embed model, preloaded turns without vectors) degrades to the plain
+        recency window.
+
+        Args:
+            user_id: User ID
+            user_question: The current question to match against
+            max_messages: Size of the fallback recency window
+
+        Returns:
+            List of history message dicts
+        """
+        history = list(self._get_history(user_id))
+        if not NUMPY_AVAILABLE or len(history) <= _TOP_K_CONTEXT:
+            return history[-max_messages:]
+
+        embs = list(self.embeddings.get(user_id, ()))
+        if len(embs) != len(history) or any(e is None for e in embs):
+            return history[-max_messages:]
+
+        question_emb = self.embed_batch([user_question])
+        if not question_emb:
+            return history[-max_messages:]
+
+        q = np.asarray(question_emb[0], dtype=np.float32)
+        matrix = np.asarray(embs, dtype=np.float32)
+        # One BLAS matvec for all similarities; guard against zero norms
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(q) or 1.0)
+        sims = (matrix @ q) / np.where(norms == 0, 1.0, norms)
+        top = np.argpartition(sims, -_TOP_K_CONTEXT)[-_TOP_K_CONTEXT:]
+        return [history[i] for i in sorted(top)]
 
     def _add_to_conversation_history(self, user_id: str, role: str, content: str):
         """
@@ -223,79 +427,232 @@ Remember: Your goal is to make learning enjoyable and accessible for every stude
             role: 'user' or 'assistant'
             content: Message content
         """
-        if user_id not in self.conversation_history:
-            self.conversation_history[user_id] = []
-        
-        self.conversation_history[user_id].append({
+        message = {
             'role': role,
             'content': content,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only last 20 messages to prevent memory issues
-        if len(self.conversation_history[user_id]) > 20:
-            self.conversation_history[user_id] = self.conversation_history[user_id][-20:]
+            'timestamp': _iso_now()
+        }
+        self._get_history(user_id).append(message)
+
+        # Keep the embedding deque parallel to the history deque
+        emb = None
+        if NUMPY_AVAILABLE:
+            vectors = self.embed_batch([content])
+            if vectors:
+                emb = np.asarray(vectors[0], dtype=np.float32)
+        self.embeddings.setdefault(user_id, deque(maxlen=20)).append(emb)
+
+        if self.history_collection is not None:
+            try:
+                # $slice keeps the cap server-side; $currentDate feeds the
+                # TTL index so idle conversations eventually expire
+                self.history_collection.update_one(
+                    {"_id": user_id},
+                    {
+                        "$push": {"messages": {"$each": [message], "$slice": -20}},
+                        "$currentDate": {"updated_at": True},
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to persist chat history for {user_id}: {e}")
+
+    def _cache_key(self, user_question: str, user_id: str) -> str:
+        """
+        Build the response-cache key for a question
+
+        Hashes the model, system prompt and the tail of the conversation so
+        the same question only hits the cache when its context matches too.
+        blake2b is used for speed; this is not a security hash.
+
+        Args:
+            user_question: Student's question
+            user_id: User ID for conversation context
+
+        Returns:
+            str: Hex digest cache key
+        """
+        history = self._get_history(user_id)
+        context_tail = json.dumps(
+            [msg.get('content', '') for msg in list(history)[-4:]]
+        )
+        key = hashlib.blake2b(digest_size=16)
+        key.update(self.model_name.encode('utf-8'))
+        key.update(self._system_hash.encode('utf-8'))
+        key.update(context_tail.encode('utf-8'))
+        key.update(user_question.encode('utf-8'))
+        return key.hexdigest()
 
     def _generate_response(self, user_question: str, user_id: str) -> str:
         """
         Generate AI response using Ollama
-        
+
         Args:
             user_question: Student's question
             user_id: User ID for conversation context
-            
+
         Returns:
             str: AI teacher's response
         """
         try:
-            # Get conversation context
-            context = self._get_conversation_context(user_id)
-            
-            # Prepare the prompt
-            prompt = f"{self.system_prompt}\n\n"
-            if context:
-                prompt += f"Previous conversation:\n{context}\n\n"
-            prompt += f"Student's current question: {user_question}\n\nPlease provide a helpful and encouraging response:"
-            
-            # Prepare request data
+            # Identical question in an identical context: reuse the cached
+            # answer instead of paying a multi-second inference round trip
+            cache_key = self._cache_key(user_question, user_id)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                self._add_to_conversation_history(user_id, 'user', user_question)
+                self._add_to_conversation_history(user_id, 'assistant', cached)
+                return cached
+
+            # Prepare request data. Streaming lets Ollama send tokens as they
+            # are generated instead of buffering the full completion first,
+            # so slow generations cannot sit silently until the timeout.
             request_data = {
                 "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
+                "messages": self._build_messages(user_question, user_id),
+                "stream": True,
                 "options": {
                     "temperature": 0.7,
                     "top_p": 0.9,
                     "max_tokens": 1000
                 }
             }
-            
-            # Make request to Ollama
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
+
+            # Make request to Ollama over the persistent session
+            response = self.session.post(
+                f"{self.ollama_base_url}/api/chat",
                 json=request_data,
-                timeout=60
+                timeout=60,
+                stream=True
             )
-            
+
             if response.status_code == 200:
-                result = response.json()
-                ai_response = result.get('response', 'I apologize, but I could not generate a response at this time.')
-                
+                # Accumulate the streamed chunks into the full response text
+                parts = []
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    parts.append(chunk.get('message', {}).get('content', ''))
+                    if chunk.get('done'):
+                        break
+                ai_response = ''.join(parts) or 'I apologize, but I could not generate a response at this time.'
+
+                # Cache the answer and evict the least recently used entry
+                self._response_cache[cache_key] = ai_response
+                if len(self._response_cache) > self._response_cache_max:
+                    self._response_cache.popitem(last=False)
+
                 # Add to conversation history
                 self._add_to_conversation_history(user_id, 'user', user_question)
                 self._add_to_conversation_history(user_id, 'assistant', ai_response)
-                
+
                 return ai_response
             else:
                 logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                self._invalidate_checks()
                 return "I'm sorry, I'm having trouble connecting to my AI system right now. Please try again later."
-                
+
         except requests.exceptions.Timeout:
             logger.error("Ollama request timed out")
             return "I'm taking a bit longer to think about your question. Please try again in a moment."
         except Exception as e:
             logger.error(f"Error generating AI response: {e}")
+            self._invalidate_checks()
+            return "I apologize, but I encountered an error while processing your question. Please try again."
+
+    def _invalidate_checks(self):
+        """Force the next chat turn to re-probe Ollama and the model"""
+        self._ollama_ok_until = 0.0
+        self._model_ok_until = 0.0
+        self._tags_expires = 0.0
+
+    async def _agenerate_response(self, client, user_question: str, user_id: str) -> str:
+        """
+        Async variant of _generate_response using the Ollama AsyncClient
+
+        Args:
+            client: ollama.AsyncClient bound to the running event loop
+            user_question: Student's question
+            user_id: User ID for conversation context
+
+        Returns:
+            str: AI teacher's response
+        """
+        try:
+            result = await client.chat(
+                model=self.model_name,
+                messages=self._build_messages(user_question, user_id),
+                options={
+                    "temperature": 0.7,
+                    "top_p": 0.9,
+                    "max_tokens": 1000
+                }
+            )
+            return result.get('message', {}).get('content') or 'I apologize, but I could not generate a response at this time.'
+        except Exception as e:
+            logger.error(f"Error generating async AI response: {e}")
             return "I apologize, but I encountered an error while processing your question. Please try again."
 
+    def chat_with_students_batch(self, items: List[Tuple[str, str]]) -> List[Dict[str, any]]:
+        """
+        Answer several student questions concurrently
+
+        Fires all prompts at once with asyncio.gather so network I/O and
+        Ollama's parallel slots (OLLAMA_NUM_PARALLEL) overlap instead of
+        each question queueing behind the previous one.
+
+        Args:
+            items: List of (user_id, question) pairs
+
+        Returns:
+            List of response dicts in the same order as the input
+        """
+        if not OLLAMA_SDK_AVAILABLE:
+            return [
+                {
+                    "success": False,
+                    "response": "I'm sorry, batch chat is currently unavailable.",
+                    "error": "Ollama SDK not installed"
+                }
+                for _ in items
+            ]
+
+        async def _run():
+            # Build the client inside the loop so its connections belong to it
+            client = AsyncClient(host=self.ollama_base_url)
+            return await asyncio.gather(*[
+                self._agenerate_response(client, question, user_id)
+                for user_id, question in items
+            ])
+
+        try:
+            responses = asyncio.run(_run())
+        except Exception as e:
+            logger.error(f"Error in chat_with_students_batch: {e}")
+            return [
+                {
+                    "success": False,
+                    "response": "I apologize, but I encountered an unexpected error. Please try again later.",
+                    "error": str(e)
+                }
+                for _ in items
+            ]
+
+        results = []
+        for (user_id, question), ai_response in zip(items, responses):
+            self._add_to_conversation_history(user_id, 'user', question)
+            self._add_to_conversation_history(user_id, 'assistant', ai_response)
+            results.append({
+                "success": True,
+                "response": ai_response,
+                "user_id": user_id,
+                "timestamp": _iso_now(),
+                "model_used": self.model_name
+            })
+        return results
+
     def chat_with_student(self, user_id: str, question: str) -> Dict[str, any]:
         """
         Main method to chat with a student
@@ -308,22 +665,28 @@ Remember: Your goal is to make learning enjoyable and accessible for every stude
             Dict containing response and metadata
         """
         try:
-            # Check Ollama connection
-            if not self._check_ollama_connection():
-                return {
-                    "success": False,
-                    "response": "I'm sorry, my AI system is currently unavailable. Please make sure Ollama is running and try again later.",
-                    "error": "Ollama connection failed"
-                }
-            
-            # Ensure model is available
-            if not self._ensure_model_available():
-                return {
-                    "success": False,
-                    "response": "I'm sorry, I'm having trouble accessing my AI model. Please try again later.",
-                    "error": "Model not available"
-                }
-            
+            # Re-validate the connection and model only when the cached
+            # checks have expired; a warm server skips both round trips
+            now = time.monotonic()
+            if now >= self._ollama_ok_until or now >= self._model_ok_until:
+                # One /api/tags call answers both questions
+                models = self._get_available_models()
+                if not models and not self._check_ollama_connection():
+                    return {
+                        "success": False,
+                        "response": "I'm sorry, my AI system is currently unavailable. Please make sure Ollama is running and try again later.",
+                        "error": "Ollama connection failed"
+                    }
+                self._ollama_ok_until = now + self._check_ttl
+
+                if self.model_name not in models and not self._ensure_model_available():
+                    return {
+                        "success": False,
+                        "response": "I'm sorry, my AI model is still being prepared. Please try again in a minute.",
+                        "error": "Model not available"
+                    }
+                self._model_ok_until = now + self._check_ttl
+
             # Generate response
             ai_response = self._generate_response(question, user_id)
             
@@ -331,7 +694,7 @@ Remember: Your goal is to make learning enjoyable and accessible for every stude
                 "success": True,
                 "response": ai_response,
                 "user_id": user_id,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": _iso_now(),
                 "model_used": self.model_name
             }
             
@@ -356,6 +719,9 @@ Remember: Your goal is to make learning enjoyable and accessible for every stude
         try:
             if user_id in self.conversation_history:
                 del self.conversation_history[user_id]
+            self.embeddings.pop(user_id, None)
+            if self.history_collection is not None:
+                self.history_collection.delete_one({"_id": user_id})
             return True
         except Exception as e:
             logger.error(f"Error clearing conversation history: {e}")
@@ -371,20 +737,20 @@ Remember: Your goal is to make learning enjoyable and accessible for every stude
         Returns:
             Dict containing conversation summary
         """
-        if user_id not in self.conversation_history:
+        history = self._get_history(user_id)
+        if not history:
             return {
                 "user_id": user_id,
                 "message_count": 0,
                 "last_message": None,
                 "conversation": []
             }
-        
-        history = self.conversation_history[user_id]
+
         return {
             "user_id": user_id,
             "message_count": len(history),
             "last_message": history[-1] if history else None,
-            "conversation": history
+            "conversation": list(history)  # deque is not JSON-serializable
         }
 
     def change_model(self, new_model: str) -> bool:
@@ -443,11 +809,19 @@ Remember: Your goal is to make learning enjoyable and accessible for every stude
 # Global instance
 ai_teacher = AITuitionTeacher()
 
+def configure_history_collection(collection):
+    """Wire the MongoDB chat_history collection into the global teacher"""
+    ai_teacher.history_collection = collection
+
 # Convenience functions for easy import
 def chat_with_ai_teacher(user_id: str, question: str) -> Dict[str, any]:
     """Convenience function to chat with AI teacher"""
     return ai_teacher.chat_with_student(user_id, question)
 
+def chat_with_ai_teacher_many(items: List[Tuple[str, str]]) -> List[Dict[str, any]]:
+    """Convenience function to answer multiple student questions concurrently"""
+    return ai_teacher.chat_with_students_batch(items)
+
 def clear_ai_conversation(user_id: str) -> bool:
     """Convenience function to clear AI conversation"""
     return ai_teacher.clear_conversation_history(user_id)
@@ -13,8 +13,12 @@ from bson import ObjectId
 
 # ----------------------------- COURSES -----------------------------
 
-def get_courses(courses_collection, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-    """Get all courses from database with optional filters."""
+def get_courses(courses_collection, filters: Optional[Dict[str, Any]] = None, as_cursor: bool = False):
+    """Get all courses from database with optional filters.
+
+    With ``as_cursor=True`` the aggregation cursor is returned directly so
+    callers can stream results instead of materializing the full list.
+    """
     query: Dict[str, Any] = {}
     if filters:
         if filters.get("category"):
@@ -24,15 +28,20 @@ def get_courses(courses_collection, filters: Optional[Dict[str, Any]] = None) ->
         if filters.get("instructor"):
             query["instructor"] = {"$regex": filters["instructor"], "$options": "i"}
 
-    courses = list(courses_collection.find(query).sort("created_at", -1))
-    for course in courses:
-        course["_id"] = str(course["_id"])
-        # Ensure all required fields exist with defaults
-        course.setdefault("enrolled_students", 0)
-        course.setdefault("rating", 0)
-        course.setdefault("duration", "")
-        course.setdefault("description", "")
-    return courses
+    # Defaulting and ObjectId stringification happen server-side in one
+    # $addFields stage, so no per-document Python loop is needed.
+    cursor = courses_collection.aggregate([
+        {"$match": query},
+        {"$sort": {"created_at": -1}},
+        {"$addFields": {
+            "_id": {"$toString": "$_id"},
+            "enrolled_students": {"$ifNull": ["$enrolled_students", 0]},
+            "rating": {"$ifNull": ["$rating", 0]},
+            "duration": {"$ifNull": ["$duration", ""]},
+            "description": {"$ifNull": ["$description", ""]},
+        }},
+    ])
+    return cursor if as_cursor else list(cursor)
 
 
 def add_course(courses_collection, course_data: Dict[str, Any]) -> Optional[str]:
@@ -59,8 +68,24 @@ def delete_course(courses_collection, course_id: str) -> bool:
 
 # ----------------------------- ASSIGNMENTS -----------------------------
 
-def get_assignments(assignments_collection, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-    """Get all assignments from database with optional filters."""
+# Shared $addFields stage: string _id plus the defaults (including the
+# adaptive learning / grading fields) the UI expects on every assignment.
+_ASSIGNMENT_DEFAULTS = {
+    "_id": {"$toString": "$_id"},
+    "points": {"$ifNull": ["$points", 100]},
+    "description": {"$ifNull": ["$description", ""]},
+    "status": {"$ifNull": ["$status", "pending"]},
+    "difficulty_level": {"$ifNull": ["$difficulty_level", 1]},
+    "score": {"$ifNull": ["$score", None]},
+    "rating": {"$ifNull": ["$rating", None]},
+}
+
+def get_assignments(assignments_collection, filters: Optional[Dict[str, Any]] = None, as_cursor: bool = False):
+    """Get all assignments from database with optional filters.
+
+    With ``as_cursor=True`` the aggregation cursor is returned directly so
+    callers can stream results instead of materializing the full list.
+    """
     query: Dict[str, Any] = {}
     if filters:
         if filters.get("course"):
@@ -70,18 +95,12 @@ def get_assignments(assignments_collection, filters: Optional[Dict[str, Any]] =
         if filters.get("due_date"):
             query["due_date"] = {"$gte": filters["due_date"]}
 
-    assignments = list(assignments_collection.find(query).sort("due_date", 1))
-    for assignment in assignments:
-        assignment["_id"] = str(assignment["_id"])
-        # Ensure all required fields exist with defaults
-        assignment.setdefault("points", 100)
-        assignment.setdefault("description", "")
-        assignment.setdefault("status", "pending")
-        # Adaptive learning / grading fields
-        assignment.setdefault("difficulty_level", 1)
-        assignment.setdefault("score", None)
-        assignment.setdefault("rating", None)
-    return assignments
+    cursor = assignments_collection.aggregate([
+        {"$match": query},
+        {"$sort": {"due_date": 1}},
+        {"$addFields": _ASSIGNMENT_DEFAULTS},
+    ])
+    return cursor if as_cursor else list(cursor)
 
 
 def add_assignment(assignments_collection, assignment_data: Dict[str, Any]) -> Optional[str]:
@@ -108,16 +127,10 @@ def delete_assignment(assignments_collection, assignment_id: str) -> bool:
 
 def get_user_assignments(assignments_collection, user_email: str) -> List[Dict[str, Any]]:
     """Get assignments for a specific user."""
-    assignments = list(assignments_collection.find({"student_email": user_email}).sort("due_date", 1))
-    for assignment in assignments:
-        assignment["_id"] = str(assignment["_id"])
-        # Ensure all required fields exist with defaults
-        assignment.setdefault("points", 100)
-        assignment.setdefault("description", "")
-        assignment.setdefault("status", "pending")
-        assignment.setdefault("difficulty_level", 1)
-        assignment.setdefault("score", None)
-        assignment.setdefault("rating", None)
-    return assignments
+    return list(assignments_collection.aggregate([
+        {"$match": {"student_email": user_email}},
+        {"$sort": {"due_date": 1}},
+        {"$addFields": _ASSIGNMENT_DEFAULTS},
+    ]))
 
 
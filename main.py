@@ -15,8 +15,8 @@ Requirements:
 
 import os
 import sys
+import threading
 import webbrowser
-import time
 from pathlib import Path
 
 # Add current directory to Python path
@@ -26,7 +26,6 @@ sys.path.insert(0, str(current_dir))
 # Import and run the Flask app
 try:
     from backend.app import app, logger, log_startup, log_success, log_error, log_info, log_warning
-    from pymongo import MongoClient
     from dotenv import load_dotenv
 except ImportError as e:
     print(f"❌ Import Error: {e}")
@@ -71,18 +70,20 @@ if __name__ == '__main__':
         log_error("MONGO_URI environment variable is not set. Please check your .env file.")
         sys.exit(1)
 
-    # Test MongoDB connection
+    # Test MongoDB connection through the app's shared, pool-tuned client
+    # instead of opening a second connection pool
     try:
-        client = MongoClient(MONGO_URI)
-        db_name = os.getenv('DB_NAME', 'learning')
-        db = client[db_name]
-        # Test the connection
+        from backend.app import client, db
         client.admin.command('ping')
-        log_success(f"Connected to MongoDB database: {db_name}")
+        log_success(f"Connected to MongoDB database: {db.name}")
     except Exception as e:
         log_error(f"Failed to connect to MongoDB: {e}")
         sys.exit(1)
 
+    # AI model warm-up runs from backend.app at import time, so it happens
+    # inside each serving process (gunicorn workers included) rather than
+    # in this launcher, which execvp replaces in production.
+
     # Create indexes for better performance
     try:
         users_collection = db.users
@@ -109,24 +110,36 @@ if __name__ == '__main__':
     print(f"💡 TIP: Click the links above or copy them to your browser!")
     print(f"{'='*60}\n")
 
-    # Auto-open browser only once (check if already opened)
-    browser_opened_file = current_dir / '.browser_opened'
-    if not browser_opened_file.exists():
-        def open_browser():
-            time.sleep(1.5)  # Wait for server to start
-            webbrowser.open(f'http://localhost:{port}')
-            # Mark that browser was opened
-            browser_opened_file.touch()
-
-        import threading
-        browser_thread = threading.Thread(target=open_browser)
-        browser_thread.daemon = True
-        browser_thread.start()
-    else:
-        log_info("Browser already opened previously - skipping auto-open")
+    # Auto-open the browser only when explicitly requested (and only in
+    # debug runs). An env toggle avoids the old .browser_opened sentinel
+    # file, which broke in read-only containers; threading.Timer fires once
+    # without leaving a sleeper thread around.
+    if os.getenv('AUTO_OPEN_BROWSER', '0') == '1' and debug_mode:
+        threading.Timer(1.5, lambda: webbrowser.open(f'http://localhost:{port}')).start()
 
     try:
-        app.run(debug=debug_mode, host=host, port=port)
+        if debug_mode:
+            app.run(debug=True, host=host, port=port)
+        else:
+            # Production: hand the process over to gunicorn so N workers x K
+            # threads can overlap LLM and Mongo I/O — the single-threaded
+            # Werkzeug dev server serializes every request behind the slowest
+            # one. Fall back to app.run if gunicorn is not installed.
+            workers = os.getenv('FLASK_WORKERS', '4')
+            threads = os.getenv('FLASK_THREADS', '8')
+            log_info(f"Starting gunicorn with {workers} workers x {threads} threads")
+            try:
+                os.execvp('gunicorn', [
+                    'gunicorn',
+                    '-w', workers,
+                    '-k', 'gthread',
+                    '--threads', threads,
+                    '-b', f'{host}:{port}',
+                    'backend.app:app',
+                ])
+            except OSError as e:
+                log_warning(f"gunicorn not available ({e}); falling back to the dev server")
+                app.run(debug=False, host=host, port=port)
     except KeyboardInterrupt:
         log_info("Shutting down Learning App...")
         log_success("👋 Learning App stopped successfully!")
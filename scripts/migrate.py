@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+🎓 Learning App - Database Migration Script
+
+Runs the one-shot index creation and data backfills that previously ran
+on every app start. Invoke once per deployment:
+
+    python scripts/migrate.py
+
+Requires the same environment variables as the app (MONGO_URI, SECRET_KEY).
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+
+# Load environment variables from both .env and env.yaml
+load_dotenv()
+try:
+    from utils import load_env_from_yaml
+    load_env_from_yaml()
+except Exception as e:
+    print(f"⚠️  Could not load env.yaml: {e}")
+
+from backend.app import run_migrations
+
+if __name__ == '__main__':
+    run_migrations()
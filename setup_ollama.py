@@ -4,13 +4,30 @@
 This script helps set up Ollama for AI chat support
 """
 
+import select
 import subprocess
 import sys
 import platform
-import requests
+from concurrent.futures import ThreadPoolExecutor
 import time
 import os
 
+# Shared keep-alive session for the localhost probes; the readiness poll
+# would otherwise open a fresh TCP connection on every attempt. requests
+# is imported lazily so `--help`-style invocations and the install path
+# don't pay its ~100 ms import cost.
+_SESSION = None
+
+def _get_session():
+    """Create the shared HTTP session on first use"""
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _SESSION = requests.Session()
+        _SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=2))
+    return _SESSION
+
 def print_banner():
     """Print setup banner"""
     print("=" * 60)
@@ -81,15 +98,19 @@ def start_ollama_service():
                            stderr=subprocess.DEVNULL)
         
         print("⏳ Waiting for Ollama to start...")
-        time.sleep(5)
-        
-        # Check if Ollama is running
-        if check_ollama_running():
-            print("✅ Ollama service started successfully!")
-            return True
-        else:
-            print("❌ Failed to start Ollama service")
-            return False
+        # Poll with backoff instead of a fixed sleep: ready in well under a
+        # second on fast machines, with up to 15 s of headroom on slow ones
+        deadline = time.monotonic() + 15.0
+        delay = 0.1
+        while time.monotonic() < deadline:
+            if check_ollama_running():
+                print("✅ Ollama service started successfully!")
+                return True
+            time.sleep(delay)
+            delay = min(delay * 1.5, 1.0)
+
+        print("❌ Failed to start Ollama service")
+        return False
             
     except Exception as e:
         print(f"❌ Error starting Ollama: {e}")
@@ -98,7 +119,7 @@ def start_ollama_service():
 def check_ollama_running():
     """Check if Ollama service is running"""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
+        response = _get_session().get("http://localhost:11434/api/tags", timeout=5)
         return response.status_code == 200
     except:
         return False
@@ -111,18 +132,50 @@ def pull_llama_model():
     print()
     
     try:
-        # Start the pull process
-        process = subprocess.Popen(['ollama', 'pull', 'llama3.2'], 
-                                 stdout=subprocess.PIPE, 
-                                 stderr=subprocess.STDOUT, 
-                                 text=True, 
-                                 bufsize=1, 
-                                 universal_newlines=True)
-        
-        # Show progress
-        for line in process.stdout:
-            if "pulling" in line.lower() or "downloading" in line.lower():
-                print(f"   {line.strip()}")
+        # Start the pull process (binary mode: skip the text-wrapper decode
+        # on every progress line)
+        process = subprocess.Popen(['ollama', 'pull', 'llama3.2'],
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT)
+
+        # Show progress, at most one line every 250 ms so a chatty pull
+        # doesn't spend its time in print()
+        last_print = 0.0
+
+        def show(line):
+            nonlocal last_print
+            lowered = line.lower()
+            if b'pulling' in lowered or b'downloading' in lowered:
+                now = time.monotonic()
+                if now - last_print >= 0.25:
+                    print(f"   {line.strip().decode(errors='replace')}")
+                    last_print = now
+
+        if platform.system().lower() == "windows":
+            # select() only handles sockets on Windows; fall back to the
+            # blocking line loop there
+            for line in process.stdout:
+                show(line)
+        else:
+            # Non-blocking drain: wake at most every 250 ms, read whatever
+            # accumulated in one big chunk instead of line by line
+            fd = process.stdout.fileno()
+            os.set_blocking(fd, False)
+            buf = b''
+            while True:
+                ready, _, _ = select.select([fd], [], [], 0.25)
+                if ready:
+                    chunk = os.read(fd, 1 << 16)
+                    if not chunk:
+                        break
+                    buf += chunk
+                    *lines, buf = buf.split(b'\n')
+                    for line in lines:
+                        show(line)
+                elif process.poll() is not None:
+                    break
+            if buf:
+                show(buf)
         
         process.wait()
         
@@ -149,8 +202,8 @@ def test_ai_chat():
             "stream": False
         }
         
-        response = requests.post("http://localhost:11434/api/generate", 
-                               json=test_data, 
+        response = _get_session().post("http://localhost:11434/api/generate",
+                               json=test_data,
                                timeout=30)
         
         if response.status_code == 200:
@@ -168,23 +221,54 @@ def test_ai_chat():
         print(f"❌ Error testing AI chat: {e}")
         return False
 
+def _list_models():
+    """List locally available model names, or [] if Ollama is unreachable"""
+    try:
+        response = _get_session().get("http://localhost:11434/api/tags", timeout=5)
+        if response.status_code == 200:
+            return [m.get('name', '') for m in response.json().get('models', [])]
+    except:
+        pass
+    return []
+
+def model_present(name, models=None):
+    """Check whether a model with the given name prefix is already local
+
+    Args:
+        name: Model name prefix, e.g. 'llama3.2' (tags report 'llama3.2:latest')
+        models: Optional pre-fetched tags listing; queried fresh if None
+    """
+    if models is None:
+        models = _list_models()
+    return any(m.startswith(name) for m in models)
+
 def main():
     """Main setup function"""
     print_banner()
-    
+
+    # The three initial probes are independent (one subprocess, two HTTP
+    # calls) — run them together instead of paying each timeout in turn
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        installed_f = pool.submit(check_ollama_installed)
+        running_f = pool.submit(check_ollama_running)
+        models_f = pool.submit(_list_models)
+        installed = installed_f.result()
+        running = running_f.result()
+        models = models_f.result()
+
     # Check if Ollama is installed
-    if not check_ollama_installed():
+    if not installed:
         print()
         if not install_ollama():
             print("❌ Setup failed. Please install Ollama manually.")
             return False
-        
+
         print()
         input("Press Enter after installing Ollama to continue...")
         print()
-    
+
     # Check if Ollama is running
-    if not check_ollama_running():
+    if not running:
         print()
         if not start_ollama_service():
             print("❌ Setup failed. Please start Ollama manually.")
@@ -192,11 +276,14 @@ def main():
             return False
     else:
         print("✅ Ollama service is already running!")
-    
+
     print()
-    
-    # Pull the model
-    if not pull_llama_model():
+
+    # Pull the model, unless the tags listing already shows it (re-probe
+    # when the listing came back empty, e.g. the service was just started)
+    if model_present('llama3.2', models or None):
+        print("✅ Llama model is already downloaded!")
+    elif not pull_llama_model():
         print("❌ Setup failed. Please pull the model manually.")
         print("   Run: ollama pull llama3.2")
         return False
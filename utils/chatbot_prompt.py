@@ -4,19 +4,27 @@ This file contains the system prompt used for the LLM chatbot.
 Modify this file to change the chatbot's behavior and instructions.
 """
 
-def get_system_prompt(detected_language='en'):
-    """
-    Returns the system prompt for the learning assistant chatbot.
-    This prompt uses chain-of-thought reasoning and markdown formatting.
-    Includes anti-hallucination safeguards.
-    
-    Args:
-        detected_language: 'en' for English, 'hi' for Hindi, 'hinglish' for Hinglish
-    """
-    # Language-specific instruction based on detection - PLACED AT THE VERY TOP
-    language_instruction = ""
-    if detected_language == 'en':
-        language_instruction = """
+import re
+from functools import lru_cache
+
+# Compiled once at import: one pattern covering both specific-date shapes
+# ("March 15" and "15 March") that may indicate hallucinated deadlines —
+# a single linear scan instead of one pass per pattern. Month names are
+# exact (full or standard abbreviation); an open-ended [a-z]* suffix
+# would also match ordinary words like "maybe 10" or "decide 3".
+_MONTHS = (
+    r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?'
+    r'|jul(?:y)?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?'
+    r'|nov(?:ember)?|dec(?:ember)?)'
+)
+_DATE_RE = re.compile(
+    r'\b(?:' + _MONTHS + r'\s+\d{1,2}|\d{1,2}\s+' + _MONTHS + r')\b',
+    re.IGNORECASE,
+)
+
+# Language-specific instruction blocks, parsed once at import. Each is
+# placed both before and after the shared body below.
+_LANG_EN = """
 ═══════════════════════════════════════════════════════════════
 🚨 CRITICAL - USER ASKED IN ENGLISH - RESPOND IN ENGLISH ONLY 🚨
 ═══════════════════════════════════════════════════════════════
@@ -45,8 +53,8 @@ EXAMPLE OF WRONG RESPONSE (DO NOT DO THIS):
 REMEMBER: If the user asks in English, you MUST respond in English. This is non-negotiable.
 ═══════════════════════════════════════════════════════════════
 """
-    elif detected_language == 'hi':
-        language_instruction = """
+
+_LANG_HI = """
 ═══════════════════════════════════════════════════════════════
 🚨 CRITICAL - USER ASKED IN HINDI - RESPOND IN HINDI/HINGLISH 🚨
 ═══════════════════════════════════════════════════════════════
@@ -62,8 +70,8 @@ REQUIRED:
 EXAMPLE: "मैं आपकी पढ़ाई, कोर्स, असाइनमेंट और शिक्षा संबंधी सवालों में मदद कर सकता हूं।"
 ═══════════════════════════════════════════════════════════════
 """
-    elif detected_language == 'hinglish':
-        language_instruction = """
+
+_LANG_HINGLISH = """
 ═══════════════════════════════════════════════════════════════
 🚨 CRITICAL - USER ASKED IN HINGLISH - RESPOND IN HINGLISH 🚨
 ═══════════════════════════════════════════════════════════════
@@ -79,8 +87,16 @@ REQUIRED:
 EXAMPLE: "Main aapko course information, study tips, aur assignment help ke baare mein bata sakta hoon."
 ═══════════════════════════════════════════════════════════════
 """
-    
-    return f"""{language_instruction}
+
+_LANG_MAP = {
+    'en': _LANG_EN,
+    'hi': _LANG_HI,
+    'hinglish': _LANG_HINGLISH,
+}
+
+# Shared prompt body; the language instruction is prepended and appended
+# around it, matching the original layout.
+_PROMPT_BODY = """
 
 You are a Learning Assistant for a student learning platform. 
 Your name is Learning Assistant - always refer to yourself as "Learning Assistant" or "AI Tutor" when introducing yourself or when asked about your name.
@@ -239,7 +255,26 @@ Keep responses well-structured with markdown formatting for better readability.
 For general educational knowledge, prioritize COMPREHENSIVENESS and DETAIL - provide extensive information.
 Only say "I don't know" for specific current data (deadlines, exact schedules), not for general learning knowledge.
 
-{language_instruction}"""
+"""
+
+
+@lru_cache(maxsize=4)
+def get_system_prompt(detected_language='en'):
+    """
+    Returns the system prompt for the learning assistant chatbot.
+    This prompt uses chain-of-thought reasoning and markdown formatting.
+    Includes anti-hallucination safeguards.
+
+    Memoized per language: the ~10 KB prompt is assembled once per process
+    for each of the three language variants instead of on every request.
+
+    Args:
+        detected_language: 'en' for English, 'hi' for Hindi, 'hinglish' for Hinglish
+    """
+    # Language-specific instruction based on detection - PLACED AT THE VERY TOP
+    language_instruction = _LANG_MAP.get(detected_language, "")
+
+    return language_instruction + _PROMPT_BODY + language_instruction
 
 
 def get_user_prompt_template():
@@ -289,20 +324,13 @@ def validate_response_for_hallucination(response_text):
     Returns a tuple: (is_valid, warning_message)
     """
     warnings = []
-    
-    # Check for specific date patterns that might be hallucinated
-    import re
-    
-    # Pattern for specific dates (e.g., "March 15", "15th March")
-    date_patterns = [
-        r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}',
-        r'\b\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)',
-    ]
-    for pattern in date_patterns:
-        if re.search(pattern, response_text, re.IGNORECASE):
-            # If dates are mentioned without context, it might be hallucination
-            if 'example' not in response_text.lower() and 'typically' not in response_text.lower():
-                warnings.append("Response contains specific dates - ensure they are contextual")
+
+    if _DATE_RE.search(response_text):
+        # If dates are mentioned without context, it might be hallucination;
+        # only lowercase the text once a date actually matched
+        lowered = response_text.lower()
+        if 'example' not in lowered and 'typically' not in lowered:
+            warnings.append("Response contains specific dates - ensure they are contextual")
     
     # Check for made-up course names or professor names
     # This is harder to detect automatically, but we can flag suspicious patterns